@@ -0,0 +1,270 @@
+"""
+Summary:
+    asyncio interface to the StsCore credential library.  Blocking Amazon STS
+    calls are executed in the event loop's default executor under a per-instance
+    semaphore so the loop is never blocked.  Credential refresh is scheduled as
+    an asyncio task instead of a RefreshScheduler thread.
+
+Module Attributes:
+    logger - logging object
+
+Example Usage:
+
+    sts_object = AsyncStsCore(profile_name='default')
+    token = await sts_object.agenerate_session_token(mfa_code='123456')
+    credentials = await sts_object.agenerate_credentials(['DynamoDBReadOnlyRole'])
+
+"""
+
+import asyncio
+import datetime
+import functools
+import pytz
+from stslib import logd
+from stslib.core import StsCore
+from stslib.results import RoleResults
+from stslib.vault import STSingleSet
+from stslib.async import jitter
+from stslib.statics import global_config
+from stslib._version import __version__
+
+
+logger = logd.getLogger(__version__)
+
+
+class AsyncStsCore(StsCore):
+    """
+    Class definition, asyncio variant of StsCore
+    """
+    def __init__(self, **kwargs):
+        """
+        Summary: initalization, attribute assignment
+
+        Args:
+            identical to StsCore.  max_workers bounds the number of STS calls
+            a single instance has in flight at any time
+        """
+        self.task = None
+        self._refresh_roles = set()
+        self._semaphore = None
+        super().__init__(**kwargs)
+
+    def _limit(self):
+        """ semaphore created on first use so it binds to the running loop """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    async def _run(self, func, *args, **kwargs):
+        """
+        Summary:
+            executes a blocking callable in the loop's default executor
+
+        Returns:
+            return value of func
+        """
+        loop = asyncio.get_event_loop()
+        async with self._limit():
+            return await loop.run_in_executor(
+                None, functools.partial(func, *args, **kwargs)
+            )
+
+    async def agenerate_session_token(self, **kwargs):
+        """
+        Summary:
+            awaitable form of StsCore.generate_session_token
+
+        Args:
+            lifetime (int): token lifetime duration in hours
+            mfa_code (str): 6 digit authorization code from a multi-factor (mfa)
+            authentication device
+
+        Returns:
+            session token | TYPE: STSToken
+        """
+        return await self._run(self.generate_session_token, **kwargs)
+
+    async def agenerate_credentials(self, accounts, token=None, strict=True):
+        """
+        Summary:
+            awaitable form of StsCore.generate_credentials.  assume_role calls
+            for all accounts are issued concurrently, bounded by max_workers
+
+        Args:
+            accounts: TYPE: list
+                List of account aliases or profile names from the local
+                awscli configuration in accounts to assume a role
+            token: TYPE: STSToken
+                optional session token; defaults to the token last generated
+            strict: TYPE: bool
+                membership checking applied to aliases; see generate_credentials
+
+        Returns:
+            iam role temporary credentials | TYPE: Dict.  Per-role outcomes
+            are recorded in self.results, as by generate_credentials
+        """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        prefix = global_config['credential_prefix'] + '-'
+
+        sts_client = self._source_client(token)
+        if sts_client is None:
+            logger.warning('No credentials generated, token is expired')
+            return {}
+        accounts = self._select(accounts, strict)
+        if accounts is None:
+            return {}    # validation fail
+
+        self.results = await self._acollect(sts_client, accounts, now, prefix)
+        if not self.results.complete:
+            # successes retained in self.results; see retry_failures
+            self._log_failures(self.results)
+            return {}
+        self._store_credentials(self.results.credentials(prefix))
+
+        # branch, auto-refresh or one-time gen of credentials
+        if self.refresh_credentials:
+            self._halt_task()
+            self._refresh_roles = set()
+            self.task = asyncio.ensure_future(self._refresh())
+            self.refresh_credentials = False
+        if self.task is not None and not self.task.done():
+            self._refresh_roles.update(accounts)
+        return dict(self.credentials)
+
+    async def _acollect(self, client, accounts, start, prefix):
+        """
+        Summary:
+            awaitable form of StsCore._collect.  Unexpired cached credentials
+            are used as they are; every other role is assumed in the executor
+            under the instance semaphore
+
+        Returns:
+            TYPE: RoleResults
+        """
+        results = RoleResults()
+        for alias, credential_set in self._cached(accounts, prefix).items():
+            results.add(alias, credential_set)
+        pending = [x for x in accounts if x not in results.successes]
+        responses = await asyncio.gather(
+            *[self._run(self._request, client, alias, prefix, start) for alias in pending],
+            return_exceptions=True
+        )
+        for alias, response in zip(pending, responses):
+            if isinstance(response, Exception):
+                results.add(alias, response)
+            else:
+                response['Credentials'].setdefault('StartTime', start)
+                results.add(alias, STSingleSet(response['Credentials']))
+        return results
+
+    async def acurrent_credentials(self):
+        """ awaitable form of StsCore.current_credentials """
+        if self.serve_stale:
+            return await self.aserve_credentials()
+        return self.current_credentials()
+
+    async def aserve_credentials(self, accounts=None):
+        """
+        Summary:
+            awaitable form of StsCore.serve_credentials.  Fresh and stale
+            roles are returned without leaving the event loop; only roles
+            past Expiration are awaited
+        """
+        expired = self._serve_plan(accounts)
+        if expired:
+            await asyncio.gather(
+                *[asyncio.wrap_future(self._revalidate(alias)) for alias in expired],
+                return_exceptions=True
+            )
+        return self._served(accounts)
+
+    def _deadlines(self, now, retry_at=None):
+        """
+        Summary:
+            refresh deadline of each role in self._refresh_roles whose
+            credentials are unexpired: expiration less refresh_skew and the
+            role's jitter, or its pending retry time if later
+
+        Args:
+            :now (datetime): current time; deadlines are no earlier than now
+            :retry_at (dict): alias: time a failed refresh is next attempted
+
+        Returns:
+            TYPE: dict, alias: (deadline, expiration)
+        """
+        prefix = global_config['credential_prefix'] + '-'
+        retry_at = retry_at or {}
+        snapshot = self.credentials
+        deadlines = {}
+        for alias in self._refresh_roles:
+            credential_set = snapshot.get(prefix + alias)
+            if credential_set is None:
+                continue
+            if self.format == 'boto':
+                end = credential_set['Expiration']
+            else:
+                end = credential_set.end
+            if end > now:
+                offset = jitter(alias, self.refresh_window, self.node_id)
+                deadline = max(end - self.refresh_skew - offset, retry_at.get(alias, now))
+                deadlines[alias] = (deadline, end)
+        return deadlines
+
+    def refresh_timeline(self):
+        """ planned refreshes of the refresh task; see StsCore.refresh_timeline """
+        if self.task is None or self.task.done():
+            return []
+        return sorted(
+            (
+                {'alias': alias, 'due': deadline, 'expiration': end}
+                for alias, (deadline, end) in self._deadlines(
+                    datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)).items()
+            ),
+            key=lambda x: x['due']
+        )
+
+    async def _refresh(self):
+        """
+        Summary:
+            asyncio replacement for the refresh scheduler thread.  Sleeps until
+            the earliest role in self._refresh_roles is due (expiration less
+            refresh_skew and jitter), then renews each due role individually.
+            A failed role is retried after 30 seconds while its credentials
+            remain valid
+        """
+        retry = datetime.timedelta(seconds=30)
+        retry_at = {}
+
+        while self._source_client() is not None:
+            now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+            deadlines = {k: v[0] for k, v in self._deadlines(now, retry_at).items()}
+            if not deadlines:
+                break
+            due = [alias for alias, deadline in deadlines.items() if deadline <= now]
+            if not due:
+                await asyncio.sleep((min(deadlines.values()) - now).total_seconds())
+                continue
+            logger.info('refresh task renewing %s' % str(due))
+            expirations = await asyncio.gather(
+                *[self._run(self._refresh_role, alias) for alias in due],
+                return_exceptions=True
+            )
+            for alias, expiration in zip(due, expirations):
+                if isinstance(expiration, datetime.datetime):
+                    retry_at.pop(alias, None)
+                else:
+                    retry_at[alias] = now + retry
+        return True
+
+    def _halt_task(self):
+        """
+        Summary: Cancel an active refresh task
+
+        Returns:
+            TYPE: Boolean | True = task cancelled, False = no active task
+        """
+        if self.task is not None and not self.task.done():
+            logger.info('Cancelling active refresh task')
+            self.task.cancel()
+            return True
+        return False
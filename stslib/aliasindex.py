@@ -0,0 +1,160 @@
+"""
+Summary:
+    Frozen index of profile aliases and the role selectors resolved against
+    it.  The index is built once per set of profiles; resolving the accounts
+    argument of StsCore credential methods is then a set lookup per alias,
+    and each selector a single pass over the index.
+
+    A ProfileStore is not read whole:  aliases and account ids are resolved
+    with the store's own indexes, and its profiles are scanned only when a
+    glob, regex or role selector is first resolved.
+
+    Selectors accepted in place of an alias match role profiles only; iam
+    user profiles are selected by exact alias alone:
+
+        - glob on alias:        '*-prod', 'acme-??-dev'
+        - regex on alias:       're:^acme-(dev|qa)$'  or a compiled pattern
+        - account id:           'account:123456789012'  (glob permitted)
+        - role name:            'role:OrgAdmin'  (glob permitted)
+
+Module Attributes:
+    - GLOB_CHARS: characters which make an alias a glob pattern
+
+"""
+
+import re
+import fnmatch
+from types import MappingProxyType
+from stslib.profilestore import ProfileStore
+
+
+GLOB_CHARS = frozenset('*?[')
+
+
+class AliasIndex():
+    """
+    immutable index of aliases, by account id and role name, built from a
+    profiles mapping (dict or ProfileStore; see module Summary)
+    """
+    def __init__(self, profiles):
+        """
+        Args:
+            :profiles (Mapping): alias: profile dict, or a ProfileStore
+        """
+        self.store = profiles if isinstance(profiles, ProfileStore) else None
+        self._entries = None
+        if self.store is None:
+            self._build(profiles.items())
+
+    def _build(self, items):
+        """ indexes (alias, profile) pairs """
+        entries = []            # (alias, account id, role name); None for iam users
+        by_account = {}
+        for alias, profile in items:
+            role_arn = profile.get('role_arn')
+            if role_arn:
+                account, role_name = role_arn.split(':')[4], role_arn.split('/')[-1]
+            else:
+                account, role_name = None, None
+            entries.append((alias, account, role_name))
+            by_account.setdefault(account, []).append(alias)
+        self._roles = tuple(e for e in sorted(entries) if e[1] is not None)
+        self._aliases = frozenset(e[0] for e in entries)
+        self._by_account = MappingProxyType(
+            {k: tuple(sorted(v)) for k, v in by_account.items() if k is not None}
+        )
+        self._entries = tuple(sorted(entries))
+
+    def _scan(self):
+        """ builds the index of a ProfileStore on first use """
+        if self._entries is None:
+            self._build(self.store.items())
+
+    @property
+    def entries(self):
+        """ (alias, account id, role name) of every profile | TYPE: tuple """
+        self._scan()
+        return self._entries
+
+    @property
+    def roles(self):
+        """ entries of role profiles, those having an account id | TYPE: tuple """
+        self._scan()
+        return self._roles
+
+    @property
+    def aliases(self):
+        """ every alias | TYPE: frozenset """
+        if self._entries is None:
+            return frozenset(self.store)        # aliases only; no profile decoded
+        return self._aliases
+
+    def by_account(self, account):
+        """ aliases of roles in account id | TYPE: tuple """
+        if self._entries is None:
+            return tuple(self.store.by_account(account))
+        return self._by_account.get(account, ())
+
+    def __contains__(self, alias):
+        if self._entries is None:
+            return alias in self.store
+        return alias in self._aliases
+
+    def __len__(self):
+        if self._entries is None:
+            return len(self.store)
+        return len(self._aliases)
+
+    def match(self, selector):
+        """
+        Summary:
+            aliases selected by a single selector
+
+        Args:
+            :selector (str or compiled regex): see module Summary
+
+        Returns:
+            matching role aliases in sorted order | TYPE: list, empty if none match
+        """
+        if hasattr(selector, 'search'):
+            return [e[0] for e in self.roles if selector.search(e[0])]
+        kind, sep, pattern = selector.partition(':')
+        if sep and kind == 're':
+            expression = re.compile(pattern)
+            return [e[0] for e in self.roles if expression.search(e[0])]
+        elif sep and kind == 'account':
+            if not GLOB_CHARS & set(pattern):
+                return list(self.by_account(pattern))
+            return [e[0] for e in self.roles if fnmatch.fnmatchcase(e[1], pattern)]
+        elif sep and kind == 'role':
+            return [e[0] for e in self.roles if fnmatch.fnmatchcase(e[2], pattern)]
+        elif GLOB_CHARS & set(selector):
+            return [e[0] for e in self.roles if fnmatch.fnmatchcase(e[0], selector)]
+        return [selector] if selector in self else []
+
+    def select(self, accounts):
+        """
+        Summary:
+            expands selectors in accounts to aliases.  Plain names are passed
+            through unchanged, as are selectors which match nothing, so that
+            validation reports them as invalid
+
+        Args:
+            :accounts (list or str): aliases and/or selectors
+
+        Returns:
+            aliases, de-duplicated, in order of first selection | TYPE: list
+        """
+        if isinstance(accounts, str) or hasattr(accounts, 'search'):
+            accounts = [accounts]
+        selected, seen = [], set()
+        for selector in accounts:
+            if isinstance(selector, str) and selector in self:
+                matches = [selector]
+            else:
+                matches = self.match(selector) or [selector]
+            for alias in matches:
+                if alias not in seen:
+                    seen.add(alias)
+                    selected.append(alias)
+        return selected
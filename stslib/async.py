@@ -2,6 +2,16 @@
 Summary:
     Non-blocking event caller
 
+    - TimeKeeper:  fixed cycle event trigger
+    - RefreshScheduler:  deadline driven trigger; calls event for each role
+      individually shortly before that role's credentials expire
+    - SharedScheduler:  process-wide RefreshScheduler; one timer thread and a
+      worker pool serve every registered StsCore instance
+
+    Refresh times are spread across a window ahead of skew by jitter derived
+    from a hash of node and role alias: stable for a given node, different
+    between nodes and roles, so fleets started together do not renew in step.
+
 Module Attributes:
     logger: TYPE logging
 
@@ -18,12 +28,35 @@ Example Use:
     )
     thread.start()
 
+    scheduler = RefreshScheduler(
+        event=<self.method of calling class, returns new expiration>,
+        skew=datetime.timedelta(minutes=5),
+        window=datetime.timedelta(minutes=5)
+    )
+    scheduler.start()
+    scheduler.schedule('DynamoDBReadOnlyRole', <expiration datetime>)
+
+    registration = shared_scheduler().register(
+        event=<self.method of calling class, returns new expiration>,
+        skew=datetime.timedelta(minutes=5)
+    )
+    registration.schedule('DynamoDBReadOnlyRole', <expiration datetime>)
+    registration.halt()     # deregister
+
 """
 
+import heapq
+import socket
+import hashlib
+import inspect
+import itertools
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from threading import current_thread
 import datetime
+import pytz
 from stslib import logd
+from stslib.statics import defaults
 from stslib._version import __version__
 
 
@@ -32,6 +65,9 @@ logger = logd.getLogger(__version__)
 
 # module attributes
 thread_exception = {}
+NODE = socket.gethostname()
+_shared = None
+_shared_lock = threading.Lock()
 
 
 class TimeKeeper(threading.Thread):
@@ -140,10 +176,355 @@ class TimeKeeper(threading.Thread):
             logger.info('remaining in cycle: %s \n ' % convert_time(residual))
         return
 
+class RefreshScheduler(threading.Thread):
+    """
+    deadline driven refresh.  Roles are held in a priority queue ordered by
+    expiration minus skew; each is refreshed individually when due, so roles
+    with different lifetimes, or added while the thread runs, are refreshed
+    on their own schedule
+    """
+    def __init__(self, event, skew, retry=datetime.timedelta(seconds=30),
+                 window=datetime.timedelta(0), node=None):
+        """
+        Args:
+            :event (method): called with a role alias when due.  Returns the
+                expiration (datetime) of the refreshed credentials, or None if
+                the refresh failed
+            :skew (datetime.timedelta): refresh at least this long before expiration
+            :retry (datetime.timedelta): delay before a failed refresh is retried
+            :window (datetime.timedelta): span ahead of skew across which
+                refreshes are jittered
+            :node (str): jitter seed identifying this node (DEFAULT: hostname)
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.event = event
+        self.skew = skew
+        self.retry = retry
+        self.window = window
+        self.node = node or NODE
+        self._halt_event = threading.Event()
+        self._cond = threading.Condition()
+        self._heap = []             # (due, sequence, alias)
+        self._entries = {}          # alias: (due, sequence, expiration)
+        self._sequence = 0
+
+    def schedule(self, alias, expiration):
+        """ queue alias for refresh ahead of expiration, replacing any entry """
+        offset = jitter(alias, self.window, self.node)
+        self._push(alias, refresh_due(expiration, self.skew + offset), expiration)
+
+    def remove(self, alias):
+        """ stop refreshing alias """
+        with self._cond:
+            self._entries.pop(alias, None)
+
+    def pending(self):
+        """
+        Returns:
+            queued refreshes in due order | TYPE: list of (alias, due datetime)
+        """
+        return [(entry['alias'], entry['due']) for entry in self.timeline()]
+
+    def timeline(self):
+        """
+        Returns:
+            planned refreshes in due order | TYPE: list of dict with keys
+            alias, due, expiration
+        """
+        with self._cond:
+            return sorted(
+                (
+                    {'alias': alias, 'due': entry[0], 'expiration': entry[2]}
+                    for alias, entry in self._entries.items()
+                ),
+                key=lambda x: x['due']
+            )
+
+    def _push(self, alias, due, expiration):
+        with self._cond:
+            self._sequence += 1
+            self._entries[alias] = (due, self._sequence, expiration)
+            heapq.heappush(self._heap, (due, self._sequence, alias))
+            self._cond.notify()
+
+    def _next_due(self):
+        """ pops the next live entry once due; None if halted. Caller holds lock """
+        while not self._halt_event.is_set():
+            # discard heap entries superseded by a later schedule or remove
+            while self._heap and self._entries.get(self._heap[0][2], (None, None))[1] != self._heap[0][1]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._cond.wait()
+                continue
+            now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+            due, sequence, alias = self._heap[0]
+            if due > now:
+                self._cond.wait(timeout=(due - now).total_seconds())
+                continue
+            heapq.heappop(self._heap)
+            return alias, self._entries.pop(alias)[2]
+        return None
+
+    def run(self):
+        """
+        Summary:
+            refresh loop; sleeps until the earliest due role
+
+        RETURNS:
+            thread status information | TYPE: dict
+        """
+        try:
+            while True:
+                with self._cond:
+                    item = self._next_due()
+                if item is None:
+                    break
+                self._dispatch(*item)
+            return {'thread_identifier': str(self.name), 'STATUS': 'COMPLETE'}
+
+        except Exception as e:
+            thread_exception['thread_identifier'] = str(self.name)
+            thread_exception['STATUS'] = 'INCOMPLETE'
+            thread_exception['Error'] = str(e)
+            logger.exception('Exception: %s' % str(thread_exception))
+            return thread_exception
+
+    def _dispatch(self, alias, expiration):
+        """ executes event for alias and queues its next refresh """
+        renew(self, alias, expiration)
+
+    def halt(self):
+        self._halt_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def dead(self):
+        return self._halt_event.is_set()
+
+
+class SharedScheduler(RefreshScheduler):
+    """
+    process-wide refresh scheduler.  StsCore instances register their refresh
+    event and skew; one timer thread tracks the deadlines of every registered
+    role and hands due refreshes to a bounded worker pool, so a slow STS call
+    for one instance does not delay the others.  Obtain the process instance
+    with shared_scheduler()
+    """
+    def __init__(self, max_workers=defaults['max_workers']):
+        """
+        Args:
+            :max_workers (int): refresh calls executed concurrently
+        """
+        RefreshScheduler.__init__(self, event=None, skew=datetime.timedelta(0))
+        self.name = 'stslib-refresh'
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._owners = {}                   # registration id: Registration
+        self._ids = itertools.count(1)
+
+    def register(self, event, skew, retry=datetime.timedelta(seconds=30),
+                 window=datetime.timedelta(0), node=None):
+        """
+        Summary:
+            adds a refresh event to the shared schedule, starting the timer
+            thread on first use
+
+        Args:
+            :event (method): called with a role alias when due; returns the
+                new expiration or None on failure
+            :skew (datetime.timedelta): refresh this long before expiration
+            :retry (datetime.timedelta): delay before a failed refresh is retried
+            :window (datetime.timedelta): span ahead of skew across which
+                refreshes are jittered
+            :node (str): jitter seed identifying this node (DEFAULT: hostname)
+
+        Returns:
+            Registration, schedules and deregisters the caller's roles
+        """
+        with self._cond:
+            registration = Registration(
+                self, next(self._ids), event, skew, retry, window, node or NODE
+            )
+            self._owners[registration.id] = registration
+            if self.ident is None:
+                self.start()
+        logger.info('%s: registered refresh owner %s (%d registered)' %
+            (inspect.stack()[0][3], registration.name, len(self._owners)))
+        return registration
+
+    def deregister(self, registration):
+        """ removes a registration and all of its queued roles """
+        with self._cond:
+            self._owners.pop(registration.id, None)
+            for key in [k for k in self._entries if k[0] == registration.id]:
+                del self._entries[key]
+        logger.info('%s: deregistered refresh owner %s' %
+            (inspect.stack()[0][3], registration.name))
+
+    def registered(self):
+        """ number of active registrations """
+        with self._cond:
+            return len(self._owners)
+
+    def _dispatch(self, key, expiration):
+        """ hands a due (registration id, alias) to the worker pool """
+        with self._cond:
+            owner = self._owners.get(key[0])
+        if owner is not None:
+            self.pool.submit(renew, owner, key[1], expiration)
+
+    def halt(self):
+        RefreshScheduler.halt(self)
+        self.pool.shutdown(wait=False)
+
+
+class Registration():
+    """
+    one StsCore instance's view of the SharedScheduler.  Provides the
+    schedule, remove, pending and halt interface of RefreshScheduler; halt
+    deregisters without stopping the shared thread
+    """
+    def __init__(self, scheduler, id, event, skew, retry, window, node):
+        self.scheduler = scheduler
+        self.id = id
+        self.event = event
+        self.skew = skew
+        self.retry = retry
+        self.window = window
+        self.node = node
+        self.name = '%s/%d' % (scheduler.name, id)
+        self._active = True
+
+    def schedule(self, alias, expiration):
+        """ queue alias for refresh ahead of expiration, replacing any entry """
+        offset = jitter(alias, self.window, self.node)
+        self._push(alias, refresh_due(expiration, self.skew + offset), expiration)
+
+    def _push(self, alias, due, expiration):
+        if self._active:
+            self.scheduler._push((self.id, alias), due, expiration)
+
+    def remove(self, alias):
+        """ stop refreshing alias """
+        self.scheduler.remove((self.id, alias))
+
+    def pending(self):
+        """
+        Returns:
+            queued refreshes in due order | TYPE: list of (alias, due datetime)
+        """
+        return [(entry['alias'], entry['due']) for entry in self.timeline()]
+
+    def timeline(self):
+        """
+        Returns:
+            planned refreshes of this registration in due order | TYPE: list
+            of dict with keys alias, due, expiration
+        """
+        return [
+            dict(entry, alias=entry['alias'][1]) for entry in self.scheduler.timeline()
+            if entry['alias'][0] == self.id
+        ]
+
+    def is_alive(self):
+        return self._active and self.scheduler.is_alive()
+
+    def halt(self):
+        self._active = False
+        self.scheduler.deregister(self)
+
+    def dead(self):
+        return not self._active
+
 #
 # --- module functions ------------------------------------------------------###
 #
 
+def shared_scheduler():
+    """
+    Summary:
+        returns the process-wide SharedScheduler, creating it on first call
+
+    Returns:
+        SharedScheduler
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None or _shared.dead():
+            _shared = SharedScheduler()
+        return _shared
+
+
+def refresh_due(expiration, skew):
+    """
+    Summary:
+        time at which credentials expiring at expiration are refreshed
+
+    Returns:
+        skew ahead of expiration; half the remaining life when that has
+        already passed | TYPE: datetime.datetime
+    """
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    due = expiration - skew
+    if due <= now:
+        # lifetime shorter than skew; refresh at half the remaining life
+        due = now + (expiration - now) / 2
+    return due
+
+
+def jitter(alias, window, node=NODE):
+    """
+    Summary:
+        deterministic refresh offset for alias on node.  A hash of node and
+        alias is mapped uniformly onto [0, window), so a node always plans a
+        role at the same point in the window while other nodes and roles are
+        spread across it
+
+    Args:
+        :alias (str): role alias
+        :window (datetime.timedelta): span of possible offsets
+        :node (str): node identifier (DEFAULT: hostname)
+
+    Returns:
+        offset | TYPE: datetime.timedelta
+    """
+    if window <= datetime.timedelta(0):
+        return datetime.timedelta(0)
+    digest = hashlib.sha256(('%s/%s' % (node, alias)).encode('utf-8')).digest()
+    fraction = int.from_bytes(digest[:8], 'big') / float(1 << 64)
+    return datetime.timedelta(seconds=window.total_seconds() * fraction)
+
+
+def renew(owner, alias, expiration):
+    """
+    Summary:
+        executes owner.event for alias and queues its next refresh with the
+        owner; failures are retried while the current credentials are valid
+
+    Args:
+        :owner (RefreshScheduler or Registration): event, retry and schedule
+        :alias (str): role alias due for refresh
+        :expiration (datetime.datetime): expiration of current credentials
+    """
+    logger.info('refreshing %s, expiration %s' % (alias, expiration.isoformat()))
+    try:
+        new_expiration = owner.event(alias)
+    except Exception as e:
+        logger.exception(
+            '%s: refresh of %s raised %s' % (inspect.stack()[0][3], alias, str(e)))
+        new_expiration = None
+    if new_expiration is not None:
+        owner.schedule(alias, new_expiration)
+        return
+    # failed; retry while the current credentials remain valid
+    retry_at = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC) + owner.retry
+    if retry_at < expiration:
+        owner._push(alias, retry_at, expiration)
+    else:
+        logger.warning('%s: %s expired, no longer refreshed' %
+            (inspect.stack()[0][3], alias))
+
+
 def convert_to_seconds(days, hours, minutes, seconds):
     """
     Summary:
@@ -0,0 +1,160 @@
+"""
+Summary:
+    Persistent credential cache.  Session tokens and temporary role
+    credentials are stored in a json file in the stslib configuration
+    directory so that a restarted process can serve unexpired credentials
+    without calling Amazon STS.  The file is written atomically and is
+    readable by the owner only.
+
+    - CredentialCache:  token and role credentials of one StsCore profile
+    - TokenStore:  session token shared between sibling processes
+
+Module Attributes:
+    - TIME_KEYS: credential fields holding datetime values
+
+"""
+
+import json
+import datetime
+import pytz
+from stslib.persist import write_atomic, read_json, FileLock
+from stslib.statics import defaults
+
+
+TIME_KEYS = ('StartTime', 'Expiration')
+
+
+def encode(boto):
+    """ boto credential dict to json-safe dict; datetimes as epoch seconds """
+    return {
+        k: (v.timestamp() if k in TIME_KEYS else v) for k, v in boto.items()
+    }
+
+
+def decode(stored):
+    """ inverse of encode; epoch seconds to tz aware datetime objects """
+    return {
+        k: (datetime.datetime.fromtimestamp(v, tz=pytz.UTC) if k in TIME_KEYS else v)
+        for k, v in stored.items()
+    }
+
+
+class CredentialCache():
+    """
+    json backed store of a session token and role credentials, boto format
+    """
+    def __init__(self, path, skew=defaults['refresh_skew']):
+        """
+        Args:
+            :path (str): cache file location
+            :skew (datetime.timedelta): entries expiring within skew of the
+                current time are treated as expired and evicted
+        """
+        self.path = path
+        self.skew = skew
+        self._lock = FileLock(path + '.lock')
+
+    def _live(self, boto, now):
+        return boto['Expiration'] - self.skew > now
+
+    def _read(self):
+        """ returns decoded, unexpired content of the cache file """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        content = read_json(self.path) or {}
+        token = content.get('token')
+        token = decode(token) if token else None
+        if token and not self._live(token, now):
+            token = None
+        credentials = {}
+        for key, stored in content.get('credentials', {}).items():
+            boto = decode(stored)
+            if self._live(boto, now):
+                credentials[key] = boto
+        return token, credentials
+
+    def _write(self, token, credentials):
+        content = {
+            'token': encode(token) if token else None,
+            'credentials': {k: encode(v) for k, v in credentials.items()}
+        }
+        return write_atomic(self.path, json.dumps(content, indent=4))
+
+    def token(self):
+        """
+        Returns:
+            unexpired session token, boto format | TYPE: dict or None
+        """
+        with self._lock:
+            return self._read()[0]
+
+    def credentials(self, keys=None):
+        """
+        Args:
+            :keys (iterable): credential keys wanted (DEFAULT: all)
+
+        Returns:
+            unexpired credentials, boto format | TYPE: dict
+        """
+        with self._lock:
+            credentials = self._read()[1]
+        if keys is None:
+            return credentials
+        return {k: credentials[k] for k in keys if k in credentials}
+
+    def save_token(self, token):
+        """ persists a session token (boto format); evicts expired entries """
+        with self._lock:
+            credentials = self._read()[1]
+            return self._write(token, credentials)
+
+    def save_credentials(self, new_credentials):
+        """ merges role credentials (boto format); evicts expired entries """
+        with self._lock:
+            token, credentials = self._read()
+            credentials.update(new_credentials)
+            return self._write(token, credentials)
+
+
+class TokenStore():
+    """
+    session token published by one process and adopted by sibling processes
+    of the same profile_user, so that only one needs to call get_session_token
+    """
+    def __init__(self, path, skew=defaults['refresh_skew']):
+        """
+        Args:
+            :path (str): token file location
+            :skew (datetime.timedelta): tokens expiring within skew of the
+                current time are not adopted
+        """
+        self.path = path
+        self.skew = skew
+        self.lock = FileLock(path + '.lock')
+
+    def read(self):
+        """ unexpired token, boto format, or None; caller holds lock """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        stored = read_json(self.path)
+        if not stored:
+            return None
+        token = decode(stored)
+        if token['Expiration'] - self.skew <= now:
+            return None
+        return token
+
+    def write(self, token):
+        """ persists token, boto format; caller holds lock """
+        return write_atomic(self.path, json.dumps(encode(token), indent=4))
+
+    def adopt(self):
+        """
+        Returns:
+            unexpired published token, boto format | TYPE: dict or None
+        """
+        with self.lock:
+            return self.read()
+
+    def publish(self, token):
+        """ makes token available to sibling processes """
+        with self.lock:
+            return self.write(token)
@@ -0,0 +1,99 @@
+"""
+Summary:
+    Cache of boto3 clients shared by StsCore methods.  Constructing a client
+    loads service models and resolves endpoints; the cache builds each client
+    once per (service, region, credential identity) and reuses it until the
+    credentials it was built with are rotated or expire.
+
+Module Attributes:
+    - SESSION_IDENTITY: identity key of clients using the session's own credentials
+
+"""
+
+import datetime
+import threading
+import pytz
+
+
+SESSION_IDENTITY = 'session'
+
+
+class ClientCache():
+    """
+    thread safe boto3 client factory keyed by (service, region, identity)
+    """
+    def __init__(self, session, config=None):
+        """
+        Args:
+            :session (boto3.Session): session from which clients are created
+            :config (botocore.config.Config): applied to every client created
+        """
+        self.session = session
+        self.config = config
+        self._clients = {}      # (service, region, identity): (client, expiration)
+        self._lock = threading.Lock()
+
+    def get(self, service, token=None, region=None):
+        """
+        Summary:
+            returns the cached client for service, creating it on first use
+
+        Args:
+            :service (str): aws service name, e.g. 'sts'
+            :token (STSToken): session token the client authenticates with;
+                None uses the session's own credentials
+            :region (str): region name (DEFAULT: session region)
+
+        Returns:
+            boto3 client object
+        """
+        region = region or self.session.region_name
+        identity = token.access_key if token else SESSION_IDENTITY
+        key = (service, region, identity)
+
+        with self._lock:
+            if key in self._clients:
+                return self._clients[key][0]
+            self._prune()
+            # session.client is not thread safe; creation serialized by lock
+            if token:
+                client = self.session.client(
+                    service,
+                    region_name=region,
+                    aws_access_key_id=token.access_key,
+                    aws_secret_access_key=token.secret_key,
+                    aws_session_token=token.session,
+                    config=self.config
+                )
+                self._clients[key] = (client, token.end)
+            else:
+                client = self.session.client(service, region_name=region, config=self.config)
+                self._clients[key] = (client, None)
+        return client
+
+    def invalidate(self, identity=None):
+        """
+        Summary:
+            discards cached clients
+
+        Args:
+            :identity (str): access key id of a rotated token; None discards all
+
+        Returns:
+            number of clients discarded | TYPE: int
+        """
+        with self._lock:
+            keys = [k for k in self._clients if identity is None or k[2] == identity]
+            for key in keys:
+                del self._clients[key]
+        return len(keys)
+
+    def _prune(self):
+        """ drops clients whose token has expired; caller holds lock """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        expired = [k for k, v in self._clients.items() if v[1] is not None and v[1] <= now]
+        for key in expired:
+            del self._clients[key]
+
+    def __len__(self):
+        return len(self._clients)
@@ -16,14 +16,28 @@ import json
 from json import JSONDecodeError
 import datetime
 import inspect
+import threading
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 import yaml
 import pytz
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, ProfileNotFound
 from stslib import logd
-from stslib.refactor import parse_awscli
-from stslib.vault import STSToken, STSCredentials
-from stslib.async import TimeKeeper, convert_time
+from stslib.refactor import parse_awscli, sync_awscli
+from stslib.profilestore import ProfileStore
+from stslib.aliasindex import AliasIndex
+from stslib.discovery import AccountDiscovery
+from stslib.vault import STSToken, STSCredentials, STSingleSet
+from stslib.results import RoleResults
+from stslib.retry import RetryPolicy
+from stslib.clients import ClientCache
+from stslib.userdir import UserDirectory
+from stslib.cache import CredentialCache, TokenStore
+from stslib.flight import ThreadFlight, ProcessFlight
+from stslib.pool import IdentityPool
+from stslib.async import RefreshScheduler, shared_scheduler, convert_time, NODE
 from stslib.statics import defaults, global_config
 from stslib._version import __version__
 
@@ -59,10 +73,96 @@ class StsCore():
                 format of credentials, either boto (native) or vault (stslib default format)
             :debug (attr, TYPE: bool):
                 optional debug flag (DEFAULT = False)
+            :max_workers (attr, TYPE: int):
+                number of assume_role calls issued concurrently when generating
+                credentials for multiple roles.  Also sets the size of the botocore
+                connection pool used by sts clients (DEFAULT = 10)
+            :retry_policy (attr, TYPE: RetryPolicy):
+                backoff and circuit breaker policy applied to all sts and iam
+                api calls.  May be shared between StsCore instances
+            :rate_limiter (attr, TYPE: RateLimiter):
+                optional token bucket limiting the rate of all sts and iam api
+                calls.  Share one limiter between StsCore instances to hold
+                their aggregate rate under the STS account quota
+            :skip_users (attr, TYPE: bool):
+                never call iam list_users; users property returns an empty
+                set (DEFAULT = False)
+            :users_ttl (attr, TYPE: int):
+                seconds the iam user directory cached in the stslib config
+                directory is used before list_users is called again
+            :cache (attr, TYPE: bool):
+                persist session token and role credentials in the stslib config
+                directory.  Unexpired entries are loaded at startup and served
+                without calling STS (DEFAULT = False)
+            :refresh_skew (attr, TYPE: int):
+                seconds before expiration at which cached credentials are
+                treated as expired (DEFAULT = 300)
+            :share_token (attr, TYPE: bool):
+                publish session tokens to, and adopt them from, a file locked
+                store shared by all processes using the same profile_name.  Only
+                one process need call get_session_token (DEFAULT = False)
+            :single_flight (attr, TYPE: bool):
+                de-duplicate assume_role across processes.  For a given
+                profile_name and role only one process calls STS; others wait
+                up to flight_timeout seconds and read its result (DEFAULT = False)
+            :flight_timeout (attr, TYPE: int):
+                seconds to wait for another process's result before calling
+                STS directly (DEFAULT = 10)
+            :refresh_window (attr, TYPE: int):
+                seconds, ahead of refresh_skew, across which role refreshes are
+                spread.  Each role's offset is a deterministic hash of node_id
+                and the role alias (DEFAULT = 300)
+            :node_id (attr, TYPE: str):
+                seed of the refresh jitter; nodes with distinct ids refresh
+                the same role at different times (DEFAULT = hostname)
+            :profile_store (attr, TYPE: bool):
+                refactor awscli profiles into an indexed sqlite store in the
+                stslib config directory instead of profiles.json.  Profiles are
+                read from the store one at a time as they are used, so startup
+                does not grow with the number of profiles (DEFAULT = False)
+            :role_template (attr, TYPE: str):
+                enables AWS Organizations account discovery.  Role arn with an
+                {account} placeholder, e.g. 'arn:aws:iam::{account}:role/OrgAdmin',
+                from which a role profile is synthesized for each active
+                account; see discover_accounts
+            :alias_template (attr, TYPE: str):
+                alias of discovered role profiles; may use {account}, {name}
+                (account name) and {role} (DEFAULT = '{name}')
+            :discovery_ttl (attr, TYPE: int):
+                seconds the discovered account list is cached before
+                ListAccounts is called again (DEFAULT = 86400)
+            :discover_duration (attr, TYPE: bool):
+                request each role's MaxSessionDuration, read via iam get_role,
+                as its credential lifetime when the role's profile sets no
+                duration_seconds.  Requires iam:GetRole on the role; roles
+                that cannot be read use the default lifetime (DEFAULT = False)
+            :serve_stale (attr, TYPE: bool):
+                current_credentials serves in stale-while-revalidate mode; see
+                serve_credentials (DEFAULT = False)
+            :shared_scheduler (attr, TYPE: bool):
+                register credential refresh with the process-wide scheduler,
+                whose one timer thread and worker pool serve every StsCore
+                instance.  False runs a dedicated scheduler thread for this
+                instance (DEFAULT = True)
+            :identities (attr, TYPE: list):
+                further StsCore instances, one per source profile, whose session
+                tokens share this instance's assume_role calls.  Calls are
+                balanced across this instance and its identities and fail over
+                between them when a token expires or is throttled; see
+                identity_stats.  Each identity generates its own session token
+            :identity_cooldown (attr, TYPE: int):
+                seconds a throttled identity is passed over (DEFAULT = 30)
+
+        iam and sts identity lookups (users, iam_user, mfa_serial) are deferred
+        until first access, so construction performs no network round-trips
         """
         # validate provided kwargs
-        keywords = ('role_file', 'output_file', 'profile_name',
-                    'log_mode', 'format', 'debug')
+        keywords = ('role_file', 'output_file', 'profile_name', 'log_mode', 'format',
+                    'debug', 'max_workers', 'retry_policy', 'rate_limiter', 'skip_users',
+                    'users_ttl', 'cache', 'refresh_skew', 'share_token', 'single_flight',
+                    'flight_timeout', 'refresh_window', 'node_id', 'profile_store', 'role_template', 'alias_template',
+                    'discovery_ttl', 'discover_duration', 'serve_stale',
+                    'shared_scheduler', 'identities', 'identity_cooldown')
         if self.filter_args(kwargs, *keywords):
             boto_profiles = kwargs.get('role_file', None)
             stslib_profiles = kwargs.get('output_file', defaults['output_file'])
@@ -70,6 +170,31 @@ class StsCore():
             self.log_mode = kwargs.get('log_mode', global_config['log_mode'])
             self.format = kwargs.get('format', defaults['format'])
             self.debug_mode = kwargs.get('debug', False)
+            self.max_workers = max(1, int(kwargs.get('max_workers', defaults['max_workers'])))
+            self.retry_policy = kwargs.get('retry_policy') or RetryPolicy()
+            self.rate_limiter = kwargs.get('rate_limiter', None)
+            self.skip_users = kwargs.get('skip_users', False)
+            users_ttl = kwargs.get('users_ttl', defaults['users_ttl'])
+            use_cache = kwargs.get('cache', False)
+            share_token = kwargs.get('share_token', False)
+            single_flight = kwargs.get('single_flight', False)
+            flight_timeout = kwargs.get('flight_timeout', defaults['flight_timeout'])
+            self.shared_scheduler = kwargs.get('shared_scheduler', True)
+            identities = kwargs.get('identities', None)
+            identity_cooldown = kwargs.get('identity_cooldown', defaults['identity_cooldown'])
+            self.refresh_window = datetime.timedelta(
+                seconds=kwargs.get('refresh_window', defaults['refresh_window'].seconds)
+            )
+            self.node_id = kwargs.get('node_id', NODE)
+            self.serve_stale = kwargs.get('serve_stale', False)
+            self.discover_duration = kwargs.get('discover_duration', False)
+            self.profile_store = kwargs.get('profile_store', False)
+            role_template = kwargs.get('role_template', None)
+            alias_template = kwargs.get('alias_template', '{name}')
+            discovery_ttl = kwargs.get('discovery_ttl', defaults['discovery_ttl'])
+            self.refresh_skew = datetime.timedelta(
+                seconds=kwargs.get('refresh_skew', defaults['refresh_skew'].seconds)
+            )
         else:
             return
 
@@ -81,6 +206,7 @@ class StsCore():
             force_rewrite=False
             )
         self.session = self._session_init(self.profile_user)
+        self.clients = ClientCache(self.session, self._client_config())
 
         # static attributes
         self.sts_max = defaults['sts_max']    # minutes, 36 hours
@@ -90,21 +216,168 @@ class StsCore():
         self.token = {}
 
         # credential attributes
-        self.credentials = {}
+        self.credentials = MappingProxyType({})   # immutable, replaced whole
+        self._publish_lock = threading.Lock()
+        self.results = RoleResults()          # per-role outcome, last batch
         self.credential_default = defaults['credential_life']
         self.credential_expiration = ''       # datetime str ("%Y-%m-%d %H:%M:%S")
+        self.role_durations = {}              # alias: DurationSeconds accepted by role
         self.refresh_credentials = False      # bool, recuring credential gen
 
-        try:
-            iam_client = self.session.client('iam')    # client scope separation
-            sts_client = self.session.client('sts')    # client scope separation
-        except Exception:
-            return
-        self.users = self.get_valid_users(iam_client)
-        self.iam_user = self._map_identity(self.profile_user, sts_client)
-        self.mfa_serial = self.get_mfa_info(self.iam_user, iam_client)
+        # stale-while-revalidate background renewals, alias: Future
+        self._revalidator = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._revalidating = {}
+        self._revalidate_lock = threading.RLock()
+
+        # persistent credential cache
+        self.cache = None
+        if use_cache:
+            self.cache = CredentialCache(
+                self.config_dir + '/credentials-' + str(self.profile_user) + '.json',
+                skew=self.refresh_skew
+            )
+            self._load_cache()
+
+        # session token shared between processes
+        self.token_store = None
+        if share_token:
+            self.token_store = TokenStore(
+                self.config_dir + '/token-' + str(self.profile_user) + '.json',
+                skew=self.refresh_skew
+            )
+            self.adopt_token()
+
+        # assume_role de-duplication; in-process always, cross-process optional
+        self.inflight = ThreadFlight()
+        self.flight = None
+        if single_flight:
+            self.flight = ProcessFlight(
+                self.config_dir + '/flight-' + str(self.profile_user),
+                self.cache or CredentialCache(
+                    self.config_dir + '/credentials-' + str(self.profile_user) + '.json',
+                    skew=self.refresh_skew
+                ),
+                flight_timeout
+            )
+
+        # source identities sharing assume_role calls; this instance first
+        self.pool = None
+        if identities:
+            self.pool = IdentityPool([self] + list(identities), identity_cooldown)
+
+        # organizations account discovery; cached profiles merged, no api call
+        self.discovery = None
+        if role_template:
+            self.discovery = AccountDiscovery(
+                self.config_dir + '/accounts-' + str(self.profile_user) + '.json',
+                role_template, alias_template, discovery_ttl
+            )
+            self._merge_discovered(self.discovery.accounts())
+
+        # identity attributes, resolved on first access
+        self.user_directory = UserDirectory(
+            self.config_dir + '/users-' + str(self.profile_user) + '.json', users_ttl
+        )
+        self._users = None
+        self._iam_user = None
+        self._mfa_serial = None
+        self._identity_lock = threading.RLock()
         self.thread = None
 
+    @property
+    def profiles(self):
+        """ parsed awscli profiles, alias: profile | TYPE: dict or ProfileStore """
+        return self._profiles
+
+    @profiles.setter
+    def profiles(self, value):
+        self._profiles = value
+        self._alias_index = None        # rebuilt on next use
+
+    @property
+    def alias_index(self):
+        """ AliasIndex of self.profiles, built once per set of profiles """
+        if self._alias_index is None:
+            self._alias_index = AliasIndex(self.profiles)
+        return self._alias_index
+
+    def select(self, accounts):
+        """
+        Summary:
+            resolves the accounts argument of the credential methods.  Besides
+            aliases, accounts may hold selectors: alias globs ('*-prod'),
+            alias regexes ('re:...'), account ids ('account:123456789012') or
+            role names ('role:OrgAdmin').  See stslib.aliasindex
+
+        Returns:
+            aliases | TYPE: list
+        """
+        return self.alias_index.select(accounts)
+
+    def _select(self, accounts, strict):
+        """
+        Summary:
+            expands selectors and validates the resulting aliases
+
+        Returns:
+            aliases to assume | TYPE: list, None when validation fails
+        """
+        accounts = self.select(accounts)
+        if not self._validate(accounts, strict):
+            return None
+        if not strict:
+            accounts = [x for x in accounts if x in self.alias_index]
+        return accounts
+
+    @property
+    def users(self):
+        """
+        valid iam users, memoized on first access.  Served from the on-disk
+        user directory while fresh, otherwise from a paginated list_users scan
+
+        Returns:
+            TYPE: frozenset
+        """
+        with self._identity_lock:
+            if self._users is None:
+                if self.skip_users:
+                    self._users = frozenset()
+                else:
+                    self._users = self.user_directory.load()
+                if self._users is None:
+                    self._users = self.user_directory.save(
+                        self.get_valid_users(self.clients.get('iam'))
+                    )
+        return self._users
+
+    @users.setter
+    def users(self, value):
+        self._users = value
+
+    @property
+    def iam_user(self):
+        """ iam user mapped to profile_user (get_caller_identity), memoized """
+        with self._identity_lock:
+            if self._iam_user is None:
+                self._iam_user = self._map_identity(self.profile_user, self.clients.get('sts'))
+        return self._iam_user
+
+    @iam_user.setter
+    def iam_user(self, value):
+        self._iam_user = value
+
+    @property
+    def mfa_serial(self):
+        """ mfa device serial of iam_user (local config or list_mfa_devices), memoized """
+        with self._identity_lock:
+            if self._mfa_serial is None:
+                self._mfa_serial = self.get_mfa_info(self.iam_user, self.clients.get('iam'))
+        return self._mfa_serial
+
+    @mfa_serial.setter
+    def mfa_serial(self, value):
+        self._mfa_serial = value
+
     def local_config(self):
         """ override defaults in statics with local config values """
         if os.path.exists(global_config['config_file']):
@@ -133,7 +406,7 @@ class StsCore():
             :param iam_user: AWS iam user mapped to profile user in local config
         """
         try:
-            iam_user = client.get_caller_identity()['Arn'].split('/')[1]
+            iam_user = self._call(client, 'get_caller_identity')['Arn'].split('/')[1]
             logger.info(
                 '%s: profile_name mapped to iam_user: %s' %
                 (inspect.stack()[0][3], iam_user)
@@ -230,7 +503,7 @@ class StsCore():
         else:
             # query aws for mfa info
             try:
-                response = client.list_mfa_devices(UserName=user)
+                response = self._call(client, 'list_mfa_devices', UserName=user)
                 if response['MFADevices']:
                     mfa_id = response['MFADevices'][0]['SerialNumber']
                 else:
@@ -257,6 +530,10 @@ class StsCore():
         Returns:
             session credentials | TYPE: dict
 
+        When share_token is enabled, an unexpired token published by a sibling
+        process is adopted instead of calling STS; a newly minted token is
+        published.  The store is locked so concurrent processes mint only once.
+
         .. code-block:: javascript
 
             {
@@ -273,22 +550,48 @@ class StsCore():
             lifetime = kwargs.get('lifetime', 1)
             mfa_code = kwargs.get('mfa_code', '')
 
+        if self.token_store is None:
+            return self._mint_session_token(lifetime, mfa_code)
+
+        # adopt a sibling's unexpired token, else mint and publish one
+        with self.token_store.lock:
+            shared = self.token_store.read()
+            if shared:
+                self.token = self._set_session_token(token_object=shared)
+                logger.info('%s: adopted shared session token expiring %s' %
+                    (inspect.stack()[0][3], self.token.expiration))
+                return self.token
+            token = self._mint_session_token(lifetime, mfa_code)
+            if isinstance(token, STSToken):
+                self.token_store.write(token.boto)
+        return token
+
+    def _mint_session_token(self, lifetime, mfa_code):
+        """
+        Summary:
+            calls sts get_session_token; see generate_session_token
+
+        Returns:
+            TYPE: STSToken, or dict if unsuccessful
+        """
         # now, timezone offset aware
         now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
         token_life = datetime.timedelta(hours=int(lifetime))
         mfa_code = str(mfa_code)
-        sts_client = self.session.client('sts')
+        sts_client = self.clients.get('sts')
 
         try:
             if (self.sts_min < token_life <= self.sts_max):
                 if self.mfa_serial:
-                    response = sts_client.get_session_token(
+                    response = self._call(
+                        sts_client, 'get_session_token',
                         DurationSeconds=token_life.seconds,
                         SerialNumber=self.mfa_serial,
                         TokenCode=mfa_code
                     )
                 else:
-                    response = sts_client.get_session_token(
+                    response = self._call(
+                        sts_client, 'get_session_token',
                         DurationSeconds=token_life.seconds
                     )
                 response['Credentials']['StartTime'] = now
@@ -296,6 +599,8 @@ class StsCore():
                 self.token = self._set_session_token(
                     token_object=response['Credentials']
                 )
+                if self.cache is not None:
+                    self.cache.save_token(self.token.boto)
             else:
                 logger.warning(
                     '%s: Requested lifetime must be STS service limits (%s - %s hrs)'
@@ -310,6 +615,39 @@ class StsCore():
             return {'Error': str(e)}
         return self.token
 
+    def adopt_token(self):
+        """
+        Summary:
+            adopts the unexpired session token published by a sibling process
+            of the same profile_user, if any
+
+        Returns:
+            TYPE: STSToken, or None if none available or sharing disabled
+        """
+        if self.token_store is None:
+            return None
+        shared = self.token_store.adopt()
+        if not shared:
+            return None
+        self.token = self._set_session_token(token_object=shared)
+        return self.token
+
+    def publish_token(self, token=None):
+        """
+        Summary:
+            makes a session token available to sibling processes
+
+        Args:
+            token (STSToken): token to publish (DEFAULT: self.token)
+
+        Returns:
+            TYPE: Boolean | True if published
+        """
+        token = token or self.token
+        if self.token_store is None or not token:
+            return False
+        return self.token_store.publish(token.boto)
+
     def generate_credentials(self, accounts, token=None, strict=True):
         """
         Summary:
@@ -318,7 +656,9 @@ class StsCore():
         Args:
             accounts: TYPE: list
                 List of account aliases or profile names from the local
-                awscli configuration in accounts to assume a role
+                awscli configuration in accounts to assume a role.  Entries
+                may also be selectors, e.g. '*-prod' or 'account:123456789012';
+                see select
 
             strict: TYPE: list
                 Determines if strict membership checking is applied to
@@ -329,8 +669,12 @@ class StsCore():
                 for all profiles that are valid, only invalid profiles will
                 fail to generate credentials
 
+            Roles are assumed concurrently by a pool of at most max_workers
+            threads; wall clock time approximates the slowest single call.
+
         Returns:
-            iam role temporary credentials | TYPE: Dict
+            iam role temporary credentials | TYPE: Dict, a copy of the
+            read-only snapshot published to self.credentials
 
         .. code-block:: javascript
 
@@ -349,53 +693,52 @@ class StsCore():
         """
         # prep, now - tz offset aware
         now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
-        session_token = token or self.token
         prefix = global_config['credential_prefix'] + '-'
-        credentials = {}
 
         try:
-            if self._valid_token(session_token):
-                # instantiate client
-                sts_client = self.session.client(
-                    'sts',
-                    aws_access_key_id=session_token.access_key,
-                    aws_secret_access_key=session_token.secret_key,
-                    aws_session_token=session_token.session
-                )
-                # one-time (non-threaded) creation of credentials
-                if self._validate(accounts, strict):
-                    for alias in accounts:
-                        response = sts_client.assume_role(
-                            RoleArn=self.profiles[alias]['role_arn'],
-                            DurationSeconds=self.credential_default.seconds,
-                            RoleSessionName=prefix + alias
-                        )
-                        response['Credentials']['StartTime'] = now
-                        credentials[prefix + alias] = response['Credentials']
-                        if self.format == 'boto':
-                            self.credentials = credentials
-                        else:
-                            self.credentials = STSCredentials(credentials).credentials
+            sts_client = self._source_client(token)
+            if sts_client is not None:
+                # concurrent assume_role fan-out, bounded by max_workers
+                accounts = self._select(accounts, strict)
+                if accounts is not None:
+                    self.results = self._collect(sts_client, accounts, now, prefix)
+                    if not self.results.complete:
+                        # successes retained in self.results; see retry_failures
+                        self._log_failures(self.results)
+                        return {}
+                    self._store_credentials(self.results.credentials(prefix))
                 else:
                     return {}    # validation fail
                 # branch, auto-refresh or one-time gen of credentials
                 if self.refresh_credentials:
                     if self.debug_mode:
-                        logger.debug('token_duration = %s min, RefreshCount = %s' %
+                        logger.debug('token_duration = %s, refresh_skew = %s' %
                             (convert_time(self.token.duration),
-                            str(self.token.duration.seconds //3600))
+                            convert_time(self.refresh_skew))
                         )
                     # stop active thread if exists before generating new one
                     self._halt_thread()
 
-                    self.thread = TimeKeeper(
-                        roles=accounts,
-                        event=self.generate_credentials,
-                        RefreshCount=(self.token.duration.seconds // 3600),
-                        debug=self.debug_mode
-                    )
-                    self.thread.start()
+                    if self.shared_scheduler:
+                        self.thread = shared_scheduler().register(
+                            event=self._refresh_role,
+                            skew=self.refresh_skew,
+                            window=self.refresh_window,
+                            node=self.node_id
+                        )
+                    else:
+                        self.thread = RefreshScheduler(
+                            event=self._refresh_role,
+                            skew=self.refresh_skew,
+                            window=self.refresh_window,
+                            node=self.node_id
+                        )
+                        self.thread.start()
                     self.refresh_credentials = False
+                if self._active_thread():
+                    # each role refreshed individually, jittered ahead of its expiration
+                    for alias, result in self.results.successes.items():
+                        self.thread.schedule(alias, result.credentials.end)
             else:
                 logger.warning('No credentials generated, token is expired')
                 return {}    # token expired
@@ -404,14 +747,534 @@ class StsCore():
                 logger.info('Strict checking %s, role invalid, skipped' % str(e))
             else:
                 raise e
-        except ClientError as e:
+        return dict(self.credentials)
+
+    def assume_roles(self, accounts, token=None, strict=True):
+        """
+        Summary:
+            partial-success form of generate_credentials.  Credentials for
+            roles assumed successfully are kept and published to
+            self.credentials even when other roles in the batch fail
+
+        Args:
+            accounts: TYPE: list
+                List of account aliases or profile names from the local
+                awscli configuration in accounts to assume a role
+            token: TYPE: STSToken
+                optional session token; defaults to the token last generated
+            strict: TYPE: bool
+                membership checking applied to aliases; see generate_credentials
+
+        Returns:
+            per-role successes and failures | TYPE: RoleResults
+        """
+        results = self._assume(accounts, token, strict)
+        self.results = results
+        if results.successes:
+            self._store_credentials(
+                results.credentials(global_config['credential_prefix'] + '-')
+            )
+        return results
+
+    def retry_failures(self, results=None, token=None, retryable_only=True):
+        """
+        Summary:
+            re-attempts only the failed roles of a previous batch.  Credentials
+            already obtained by that batch are reused, not regenerated
+
+        Args:
+            results: TYPE: RoleResults
+                outcome of an earlier generate_credentials, assume_roles or
+                retry_failures call (DEFAULT: self.results)
+            token: TYPE: STSToken
+                optional session token; defaults to the token last generated
+            retryable_only: TYPE: bool
+                retry only failures with a retryable error code (DEFAULT),
+                otherwise retry every failed role
+
+        Returns:
+            merged outcome of both attempts | TYPE: RoleResults
+        """
+        results = results or self.results
+        if retryable_only:
+            accounts = results.retryable()
+        else:
+            accounts = list(results.failures)
+        if not accounts:
+            return results
+
+        merged = results.merge(self._assume(accounts, token, strict=True))
+        self.results = merged
+        self._store_credentials(
+            merged.credentials(global_config['credential_prefix'] + '-')
+        )
+        return merged
+
+    def _assume(self, accounts, token=None, strict=True):
+        """
+        Summary:
+            validates accounts and session token, then assumes each role
+
+        Returns:
+            TYPE: RoleResults | empty if token expired or validation fails
+        """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        prefix = global_config['credential_prefix'] + '-'
+
+        sts_client = self._source_client(token)
+        if sts_client is None:
+            logger.warning('No credentials generated, token is expired')
+            return RoleResults()
+        accounts = self._select(accounts, strict)
+        if accounts is None:
+            return RoleResults()
+        results = self._collect(sts_client, accounts, now, prefix)
+        self._log_failures(results)
+        return results
+
+    def _collect(self, client, accounts, start, prefix):
+        """ gathers _fan_out outcomes into a RoleResults object """
+        results = RoleResults()
+        for alias, outcome in self._fan_out(client, accounts, start, prefix):
+            results.add(alias, outcome)
+        return results
+
+    def _log_failures(self, results):
+        """ logs each failed role in a RoleResults batch """
+        for alias, result in results.failures.items():
             logger.critical(
                 '%s: Assume role exception in account %s (Code: %s Message: %s)' %
+                (inspect.stack()[0][3], alias, result.code, result.message))
+
+    def _refresh_role(self, alias):
+        """
+        Summary:
+            refresh scheduler event.  Renews credentials for a single role
+            with the current session token and merges them into the
+            published snapshot
+
+        Args:
+            :alias (str): profile name of the role
+
+        Returns:
+            expiration of the new credentials | TYPE: datetime, None on failure
+        """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        prefix = global_config['credential_prefix'] + '-'
+
+        sts_client = self._source_client()
+        if sts_client is None:
+            return None
+        try:
+            response = self._request(sts_client, alias, prefix, now)
+        except ClientError as e:
+            logger.warning(
+                '%s: refresh failed for %s (Code: %s Message: %s)' %
                 (inspect.stack()[0][3], alias, e.response['Error']['Code'],
                 e.response['Error']['Message']))
-            return {}
+            return None
+        credential_set = STSingleSet(response['Credentials'])
+        self._store_credentials({prefix + alias: credential_set.boto}, merge=True)
+        return credential_set.end
+
+    def _store_credentials(self, credentials, persist=True, merge=False):
+        """
+        Summary:
+            publish newly generated credentials to the instance in the
+            configured credential format.  A complete, read-only snapshot is
+            built first and then bound to self.credentials in one assignment,
+            so readers never observe a partially built set and need no lock
+
+        Args:
+            :credentials (dict): boto format credentials keyed by prefixed alias
+            :persist (bool): also write credentials to the cache, if enabled
+            :merge (bool): add to, rather than replace, the current snapshot
+
+        Returns:
+            credentials in format set by self.format | TYPE: MappingProxyType
+        """
+        if persist and self.cache is not None:
+            self.cache.save_credentials(credentials)
+        if self.format == 'boto':
+            snapshot = dict(credentials)
+        else:
+            snapshot = STSCredentials(credentials).credentials
+        with self._publish_lock:
+            if merge:
+                snapshot = dict(self.credentials, **snapshot)
+            self.credentials = MappingProxyType(snapshot)
         return self.credentials
 
+    def iter_credentials(self, accounts, token=None, strict=True):
+        """
+        Summary:
+            generator form of generate_credentials.  Yields temporary credentials
+            for each role as its assume_role call completes, allowing callers to
+            begin work in one account while others are still being assumed
+
+        Args:
+            accounts: TYPE: list
+                List of account aliases or profile names from the local
+                awscli configuration in accounts to assume a role
+            token: TYPE: STSToken
+                optional session token; defaults to the token last generated
+            strict: TYPE: bool
+                membership checking applied to aliases; see generate_credentials
+
+        Yields:
+            (alias, STSingleSet) or (alias, Exception) | TYPE: tuple
+            in order of completion.  Nothing is yielded if the session token is
+            expired or the accounts list fails validation
+        """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        prefix = global_config['credential_prefix'] + '-'
+
+        sts_client = self._source_client(token)
+        if sts_client is None:
+            logger.warning('No credentials generated, token is expired')
+            return
+        accounts = self._select(accounts, strict)
+        if accounts is None:
+            return
+        for alias, result in self._fan_out(sts_client, accounts, now, prefix):
+            yield alias, result
+
+    def _fan_out(self, client, accounts, start, prefix):
+        """
+        Summary:
+            issues assume_role for each alias across a bounded thread pool
+
+        Args:
+            :client (boto3.client): sts client authenticated with the session
+                token, or the IdentityPool; see _source_client
+            :accounts (list): validated profile aliases
+            :start (datetime): StartTime recorded with each credential set
+            :prefix (str): RoleSessionName prefix
+
+        Yields:
+            (alias, STSingleSet) or (alias, Exception) in completion order.
+            Unexpired cached credentials are yielded first, without an STS call
+        """
+        cached = self._cached(accounts, prefix)
+        for alias, credential_set in cached.items():
+            yield alias, credential_set
+        accounts = [x for x in accounts if x not in cached]
+        if not accounts:
+            return
+
+        workers = min(self.max_workers, max(len(accounts), 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._request, client, alias, prefix, start): alias
+                for alias in accounts
+            }
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except Exception as e:      # per role; others in the batch proceed
+                    yield futures[future], e
+                    continue
+                response['Credentials'].setdefault('StartTime', start)
+                yield futures[future], STSingleSet(response['Credentials'])
+
+    def _cached(self, accounts, prefix):
+        """
+        Summary:
+            unexpired credentials held in the persistent cache
+
+        Returns:
+            TYPE: dict | {alias: STSingleSet}, empty if caching disabled
+        """
+        if self.cache is None:
+            return {}
+        found = self.cache.credentials(prefix + alias for alias in accounts)
+        return {
+            alias: STSingleSet(found[prefix + alias])
+            for alias in accounts if prefix + alias in found
+        }
+
+    def _load_cache(self):
+        """
+        Summary:
+            adopt unexpired session token and credentials from the persistent
+            cache at startup
+
+        Returns:
+            TYPE: Boolean | True if anything was loaded
+        """
+        token = self.cache.token()
+        if token:
+            self.token = self._set_session_token(token_object=token)
+        credentials = self.cache.credentials()
+        if credentials:
+            self._store_credentials(credentials, persist=False)
+        logger.info(
+            '%s: loaded session token: %s, credentials: %d from cache' %
+            (inspect.stack()[0][3], bool(token), len(credentials)))
+        return bool(token or credentials)
+
+    def _source_client(self, token=None):
+        """
+        Summary:
+            source of the sts clients assume_role is called with.  When
+            identities are pooled and no token is given, calls are balanced
+            across the identity pool rather than made with one token
+
+        Args:
+            :token (STSToken): session token (DEFAULT: self.token)
+
+        Returns:
+            boto3 sts client or IdentityPool | None if no valid token
+        """
+        if token is None and self.pool is not None and self.pool.live():
+            return self.pool
+        token = token or self.token
+        if not self._valid_token(token):
+            return None
+        return self._token_client(token)
+
+    def _token_client(self, token):
+        """
+        Summary:
+            cached sts client authenticated with a session token.  Connection
+            pool is sized to max_workers so concurrent calls do not queue for
+            sockets
+
+        Args:
+            :token (STSToken): valid session token
+
+        Returns:
+            boto3 sts client object
+        """
+        return self.clients.get('sts', token=token)
+
+    def _client_config(self):
+        """
+        Summary:
+            botocore configuration shared by all clients.  botocore's own
+            retries are disabled; retries, including those of connection
+            errors and read timeouts, are applied by self.retry_policy
+
+        Returns:
+            botocore.config.Config object
+        """
+        return Config(
+            max_pool_connections=self.max_workers,
+            retries={'max_attempts': 0}
+        )
+
+    def _call(self, client, operation, key=None, attempts=None, **kwargs):
+        """
+        Summary:
+            invokes an sts or iam api operation under the retry policy.  When
+            a rate limiter is configured every attempt first acquires a permit
+
+        Args:
+            :client (boto3.client): client exposing the operation
+            :operation (str): client method name, e.g. 'assume_role'
+            :key (str): circuit breaker key, typically an account id
+            :attempts (int): overrides the policy's max_attempts; see RetryPolicy.call
+            :kwargs: operation parameters
+
+        Returns:
+            api response | TYPE: dict
+        """
+        func = getattr(client, operation)
+        if self.rate_limiter is not None:
+            func = self.rate_limiter.limit(func)
+        return self.retry_policy.call(func, key=key, attempts=attempts, **kwargs)
+
+    def _request(self, source, alias, prefix, start):
+        """
+        Summary:
+            assume_role for a single alias with a client from _source_client.
+            Pooled requests are issued through the least loaded identity and
+            fail over between identities
+
+        Returns:
+            sts assume_role response | TYPE: dict
+        """
+        if isinstance(source, IdentityPool):
+            return source.call(self._request_role, alias, prefix, start)
+        return self._request_role(source, alias, prefix, start)
+
+    def _request_role(self, client, alias, prefix, start, attempts=None):
+        """
+        Summary:
+            assume_role for a single alias.  Concurrent requests for an alias
+            already in flight in this process wait for that call rather than
+            issuing another (counted in self.inflight.stats()).  Requests are
+            also de-duplicated across processes when single_flight is enabled;
+            another process's result is then adopted only if it expires later
+            than the credentials already held for the alias
+
+        Args:
+            :client (boto3.client): sts client authenticated with the session token
+            :alias (str): profile name of the role to be assumed
+            :prefix (str): RoleSessionName prefix
+            :start (datetime): StartTime recorded with the credentials
+            :attempts (int): overrides the retry policy's max_attempts
+
+        Returns:
+            sts assume_role response | TYPE: dict
+        """
+        def assume():
+            response = self._assume_role(client, alias, prefix, attempts)
+            response['Credentials'].setdefault('StartTime', start)
+            return response['Credentials']
+
+        def call():
+            if self.flight is None:
+                return {'Credentials': assume()}
+            held = self.credentials.get(prefix + alias)
+            after = self._expiration(held) if held else None
+            return {'Credentials': self.flight.run(prefix + alias, assume, after)}
+        return self.inflight.run(prefix + alias, call)
+
+    def _assume_role(self, client, alias, prefix, attempts=None):
+        """
+        Summary:
+            assume the iam role for a single profile alias.  Executed by
+            _fan_out worker threads via _request_role; boto3 clients are
+            thread safe.  Credentials are requested for the role's own
+            lifetime (see role_duration).  When the role rejects it as
+            exceeding its MaxSessionDuration, the longest duration the role
+            accepts is found by _fit_duration and remembered
+
+        Args:
+            :client (boto3.client): sts client authenticated with the session token
+            :alias (str): profile name of the role to be assumed
+            :prefix (str): RoleSessionName prefix
+            :attempts (int): overrides the retry policy's max_attempts
+
+        Returns:
+            sts assume_role response | TYPE: dict
+        """
+        role_arn = self.profiles[alias]['role_arn']
+        duration = self.role_duration(alias)
+        try:
+            response = self._call(
+                client, 'assume_role',
+                key=role_arn.split(':')[4],
+                attempts=attempts,
+                RoleArn=role_arn,
+                DurationSeconds=duration,
+                RoleSessionName=prefix + alias
+            )
+        except ClientError as e:
+            if not self._duration_rejected(e) or duration <= 3600:
+                raise
+            logger.info(
+                '%s: %s rejected DurationSeconds %d' %
+                (inspect.stack()[0][3], alias, duration))
+            response, duration = self._fit_duration(client, alias, prefix, duration, attempts)
+            if response is None:
+                raise
+        self.role_durations[alias] = duration
+        return response
+
+    def _fit_duration(self, client, alias, prefix, rejected, attempts=None):
+        """
+        Summary:
+            assumes a role with the longest whole hour duration below one it
+            rejected.  The role's MaxSessionDuration is requested first if
+            iam get_role can read it; otherwise the duration is bisected, at
+            most four calls across the 12 hour range.  Probes do not count
+            toward the account's circuit breaker
+
+        Args:
+            :client (boto3.client): sts client authenticated with the session token
+            :alias (str): profile name of the role to be assumed
+            :prefix (str): RoleSessionName prefix
+            :rejected (int): DurationSeconds the role rejected
+            :attempts (int): overrides the retry policy's max_attempts
+
+        Returns:
+            (assume_role response, DurationSeconds) | TYPE: tuple,
+            (None, None) if the role accepts no shorter duration
+        """
+        role_arn = self.profiles[alias]['role_arn']
+
+        def probe(duration):
+            try:
+                return self._call(
+                    client, 'assume_role',
+                    attempts=attempts,
+                    RoleArn=role_arn,
+                    DurationSeconds=duration,
+                    RoleSessionName=prefix + alias
+                )
+            except ClientError as e:
+                if not self._duration_rejected(e):
+                    raise
+                return None
+
+        accepted = None, None
+        maximum = self._max_session_duration(alias)
+        if maximum is not None and 3600 <= maximum < rejected:
+            accepted = probe(maximum), maximum
+        if accepted[0] is None:
+            low, high = 1, (rejected - 1) // 3600       # hours
+            while low <= high:
+                hours = (low + high + 1) // 2
+                response = probe(hours * 3600)
+                if response is None:
+                    high = hours - 1
+                else:
+                    accepted = response, hours * 3600
+                    low = hours + 1
+        if accepted[0] is None:
+            return None, None
+        logger.info(
+            '%s: %s accepted DurationSeconds %d' %
+            (inspect.stack()[0][3], alias, accepted[1]))
+        self.retry_policy.breaker(role_arn.split(':')[4]).record_success()
+        return accepted
+
+    def role_duration(self, alias):
+        """
+        Summary:
+            credential lifetime requested for a role.  In order of precedence:
+            the longest duration the role has accepted, duration_seconds from
+            the role's profile, the role's MaxSessionDuration (discover_duration),
+            or the default credential lifetime
+
+        Args:
+            :alias (str): profile name of the role
+
+        Returns:
+            DurationSeconds | TYPE: int
+        """
+        if alias in self.role_durations:
+            return self.role_durations[alias]
+        duration = self.profiles[alias].get('duration_seconds')
+        if duration is None and self.discover_duration:
+            duration = self._max_session_duration(alias)
+        if duration is None:
+            duration = self.credential_default.seconds
+        return max(
+            self.sts_min.seconds,
+            min(int(duration), int(defaults['role_duration_max'].total_seconds()))
+        )
+
+    def _max_session_duration(self, alias):
+        """ role MaxSessionDuration via iam get_role; None if unavailable """
+        role_name = self.profiles[alias]['role_arn'].split('/')[-1]
+        try:
+            response = self._call(self.clients.get('iam'), 'get_role', RoleName=role_name)
+        except ClientError as e:
+            logger.info(
+                '%s: MaxSessionDuration of %s unavailable (Code: %s Message: %s)' %
+                (inspect.stack()[0][3], alias, e.response['Error']['Code'],
+                e.response['Error']['Message']))
+            return None
+        return response['Role'].get('MaxSessionDuration')
+
+    def _duration_rejected(self, e):
+        """ True if ClientError e rejects the requested DurationSeconds """
+        error = e.response['Error']
+        return error['Code'] == 'ValidationError' and 'DurationSeconds' in error.get('Message', '')
+
     def current_credentials(self):
         """ returns credentials when refreshed
 
@@ -420,15 +1283,155 @@ class StsCore():
             :param self.credentials: latest credentials generated and stored as class attribute
 
         Returns:
-            Valid credentials | None if expired {}
+            Valid credentials, the unexpired roles of the published snapshot
+            | TYPE: dict, {} if all expired.  When serve_stale is set, see
+            serve_credentials
 
         """
-        if self.credentials:
-            if self.calc_lifetime(credentials=self.credentials)[1].seconds > 0:
-                return self.credentials
-            else:
-                logger.info('credentials expired')
-        return {}
+        if self.serve_stale:
+            return self.serve_credentials()
+        snapshot = self.credentials    # single read; consistent while refreshing
+        valid = self._unexpired(snapshot)
+        if len(valid) < len(snapshot):
+            logger.info('%s: credentials expired for %s' %
+                (inspect.stack()[0][3], sorted(set(snapshot) - set(valid))))
+        return valid
+
+    def serve_credentials(self, accounts=None):
+        """
+        Summary:
+            stale-while-revalidate read of role credentials.  A role within
+            refresh_skew of expiration is served from the current snapshot
+            immediately while it is renewed in the background; the caller
+            blocks only for roles already past Expiration, and then shares
+            any renewal already in flight.  See staleness for per-role age
+
+        Args:
+            :accounts (list): role aliases (DEFAULT: all roles held)
+
+        Returns:
+            unexpired credentials keyed by prefixed alias | TYPE: dict, a
+            copy as returned by current_credentials.  Roles which could not
+            be renewed are omitted
+        """
+        expired = self._serve_plan(accounts)
+        if expired:
+            logger.info('%s: blocking on renewal of expired roles %s' %
+                (inspect.stack()[0][3], str(expired)))
+            wait([self._revalidate(alias) for alias in expired])
+        return self._served(accounts)
+
+    def staleness(self, accounts=None):
+        """
+        Summary:
+            time each role has been served past its refresh point
+            (Expiration less refresh_skew)
+
+        Args:
+            :accounts (list): role aliases (DEFAULT: all roles held)
+
+        Returns:
+            TYPE: dict, alias: datetime.timedelta (zero when fresh)
+        """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        ages = {}
+        for alias, credential_set in self._held(self.credentials, accounts):
+            age = now - (self._expiration(credential_set) - self.refresh_skew)
+            ages[alias] = max(age, datetime.timedelta(0))
+        return ages
+
+    def _held(self, snapshot, accounts=None):
+        """ (alias, credential set) pairs in snapshot, optionally limited to accounts """
+        prefix = global_config['credential_prefix'] + '-'
+        if accounts is None:
+            accounts = [k[len(prefix):] for k in snapshot if k.startswith(prefix)]
+        return [(a, snapshot[prefix + a]) for a in accounts if prefix + a in snapshot]
+
+    def _expiration(self, credential_set):
+        """ Expiration of a credential set in either credential format """
+        if self.format == 'boto':
+            return credential_set['Expiration']
+        return credential_set.end
+
+    def _serve_plan(self, accounts):
+        """
+        Summary:
+            starts background renewal of stale roles
+
+        Returns:
+            aliases of roles past Expiration | TYPE: list
+        """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        expired = []
+        for alias, credential_set in self._held(self.credentials, accounts):
+            end = self._expiration(credential_set)
+            if end <= now:
+                expired.append(alias)
+            elif end - self.refresh_skew <= now:
+                self._revalidate(alias)
+        return expired
+
+    def _served(self, accounts):
+        """ unexpired subset of the current snapshot, a copy | TYPE: dict """
+        return self._unexpired(self.credentials, accounts)
+
+    def _unexpired(self, snapshot, accounts=None):
+        """ roles of snapshot each unexpired by its own Expiration | TYPE: dict """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        prefix = global_config['credential_prefix'] + '-'
+        return {
+            prefix + alias: credential_set
+            for alias, credential_set in self._held(snapshot, accounts)
+            if self._expiration(credential_set) > now
+        }
+
+    def _revalidate(self, alias):
+        """
+        Summary:
+            renews alias on the background pool unless a renewal is already
+            running
+
+        Returns:
+            concurrent.futures.Future, result is the new expiration or None
+        """
+        with self._revalidate_lock:
+            future = self._revalidating.get(alias)
+            if future is None:
+                future = self._revalidator.submit(self._refresh_role, alias)
+                self._revalidating[alias] = future
+                future.add_done_callback(lambda f: self._revalidated(alias, f))
+        return future
+
+    def _revalidated(self, alias, future):
+        with self._revalidate_lock:
+            if self._revalidating.get(alias) is future:
+                del self._revalidating[alias]
+
+    def identity_stats(self):
+        """
+        Summary:
+            assume_role calls issued by each source identity of the pool
+
+        Returns:
+            TYPE: dict, profile_user: {'calls', 'throttled', 'unreachable',
+            'expired', 'failovers', 'in_flight'}; empty when identities are not pooled
+        """
+        if self.pool is None:
+            return {}
+        return self.pool.stats()
+
+    def refresh_timeline(self):
+        """
+        Summary:
+            planned credential refreshes, for inspection
+
+        Returns:
+            TYPE: list of dict (alias, due, expiration) in due order; empty
+            when credential refresh is not active
+        """
+        if self._active_thread():
+            return self.thread.timeline()
+        return []
 
     def _active_thread(self):
         """
@@ -443,7 +1446,7 @@ class StsCore():
 
     def _halt_thread(self):
         """
-        Summary: Stop an active thread
+        Summary: Stop an active thread, or deregister from the shared scheduler
 
         Returns:
             TYPE: Boolean | True = stopped, False = running
@@ -477,15 +1480,10 @@ class StsCore():
             TYPE: Boolean
         """
 
-        profile_aliases = []
-
-        for profile in self.profiles.keys():
-            profile_aliases.append(profile)
+        invalid = set(x for x in list if x not in self.alias_index)
+        valid = set(list) - invalid
 
-        invalid = set(list) - set(profile_aliases)
-        valid = set(list) - set(invalid)
-
-        if set(list).issubset(set(profile_aliases)):
+        if not invalid:
             logger.info('%s: Valid account profile names: %s' %
             (inspect.stack()[0][3], str(list)))
             return True
@@ -500,7 +1498,7 @@ class StsCore():
         else:
             # relaxed checking
             logger.warning('%s: Valid profile names: %s, Invalid Names: %s' %
-            (inspect.stack()[0][3], str(valid)), str(invalid))
+            (inspect.stack()[0][3], str(valid), str(invalid)))
             return True
 
     def _valid_token(self, token=None):
@@ -517,7 +1515,7 @@ class StsCore():
         elif now >= token.end:
             logger.warning(
                 '%s: token expired on %s' %
-                (inspect.stack()[0][3], token['Expiration'].isoformat())
+                (inspect.stack()[0][3], token.expiration)
             )
             return False    # expired
         return True
@@ -573,6 +1571,9 @@ class StsCore():
         default_hi = self.credential_default + drift
         # init STSToken obj
         token = STSToken(token_object)
+        # clients built with the rotated token are discarded
+        if self.token and self.token.access_key != token.access_key:
+            self.clients.invalidate(self.token.access_key)
 
         #token.duration = duration
         if default_low < token.duration < default_hi:
@@ -610,15 +1611,17 @@ class StsCore():
         """ Return remaining time on sts token, sts temporary credentials
 
         Args:
-            :type credentials:  STSCredentials object (if specified)
+            :type credentials:  credentials snapshot (if specified)
             :param credentials: generated for which remaining life requested
+                (DEFAULT: self.credentials)
 
             :type self.token: STSToken object (if exists)
             :param self.token: latest token generated
 
         Returns:
             tuple containing TYPE: datetime.timedelta objects (DEFAULT)
-            human_readable: returns tuple containing strings
+            human_readable: returns tuple containing strings.  Credential
+            life is that of the role expiring soonest
 
         .. code-block:: javascript
 
@@ -631,26 +1634,25 @@ class StsCore():
             # now, timezone offset aware
             now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
 
-            credentials = self.credentials
-            keys = []
-            for key in credentials:
-                keys.append(key)
-            if self.format == 'boto':
-                credential_expiration = credentials[keys[0]]['Expiration']
+            credentials = self.credentials if credentials is None else credentials
+            token = self.token
+            if not credentials:
+                credential_expiration = now
             else:
-                credential_expiration = credentials[keys[0]].end
+                credential_expiration = min(
+                    self._expiration(x) for x in credentials.values()
+                )
 
-            if self.token:
-                if self.token.end >= now:
-                    token_life_reamining = self.token.end - now
+            if token:
+                if token.end >= now:
+                    token_life_reamining = token.end - now
                 else:
                     token_life_reamining = datetime.timedelta(minutes=0)
             else:
                 token_life_reamining = datetime.timedelta(minutes=0)
 
-            if credentials:
-                if credential_expiration >= now:
-                    credential_life_remaining = credential_expiration - now
+            if credentials and credential_expiration >= now:
+                credential_life_remaining = credential_expiration - now
             else:
                 credential_life_remaining = datetime.timedelta(minutes=0)
 
@@ -664,7 +1666,8 @@ class StsCore():
     def get_valid_users(self, client):
         """
         Summary:
-            Retrieve list valid iam users from local config
+            Retrieve list valid iam users from local config.  All pages of
+            list_users results are retrieved
 
         Arg:
             iam client object
@@ -674,7 +1677,7 @@ class StsCore():
         """
         users = []
         try:
-            users = [x['UserName'] for x in client.list_users()['Users']]
+            users = list(self.iter_users(client))
         except ClientError as e:
             logger.critical(
                 '%s: User not valid or permissions inadequate (Code: %s Message: %s)' %
@@ -683,6 +1686,119 @@ class StsCore():
             raise
         return users
 
+    def discover_accounts(self, force=False, page_size=None):
+        """
+        Summary:
+            adds a role profile for each active account in the organization,
+            synthesized from role_template.  organizations:ListAccounts is
+            called only when the cached account list is older than
+            discovery_ttl (or force); profiles are then synthesized for
+            accounts new since the last run and removed for accounts no
+            longer active.  Profiles in the awscli credentials file take
+            precedence over discovered profiles of the same alias
+
+        Args:
+            :force (bool): call ListAccounts regardless of cache age
+            :page_size (int): accounts per ListAccounts page (DEFAULT: service
+                default, 20 at most)
+
+        Returns:
+            aliases written | TYPE: dict with keys added, removed (lists)
+        """
+        if self.discovery is None:
+            logger.warning('%s: account discovery requires role_template' % inspect.stack()[0][3])
+            return {'added': [], 'removed': []}
+        removed = {}
+        if force or not self.discovery.fresh():
+            try:
+                added, removed = self.discovery.update(
+                    self.iter_accounts(self.clients.get('organizations'), page_size)
+                )
+            except ClientError as e:
+                logger.critical(
+                    '%s: ListAccounts failed (Code: %s Message: %s)' %
+                    (inspect.stack()[0][3], e.response['Error']['Code'],
+                    e.response['Error']['Message']))
+                raise
+            logger.info('%s: %d accounts new, %d removed since last discovery' %
+                (inspect.stack()[0][3], len(added), len(removed)))
+        return self._merge_discovered(self.discovery.accounts(), removed)
+
+    def _merge_discovered(self, accounts, removed=None):
+        """
+        Summary:
+            writes discovered profiles missing from self.profiles and deletes
+            those of removed accounts; into the ProfileStore when enabled
+
+        Args:
+            :accounts (dict): account id: discovery cache entry
+            :removed (dict): account id: cache entry of accounts removed
+
+        Returns:
+            aliases written | TYPE: dict with keys added, removed (lists)
+        """
+        source = self.profiles.get(self.profile_user) or {}
+        synthesized = self.discovery.profiles(
+            accounts, self.profile_user, source.get('mfa_serial', '')
+        )
+        added = {k: v for k, v in synthesized.items() if k not in self.profiles}
+        gone = [
+            entry['alias'] for account_id, entry in (removed or {}).items()
+            if (self.profiles.get(entry['alias']) or {}).get('role_arn') ==
+            self.discovery.role_template.format(account=account_id)
+        ]
+        if added or gone:
+            if isinstance(self.profiles, ProfileStore):
+                self.profiles.update(added, removed=gone)
+                self._alias_index = None
+            else:
+                profiles = {k: v for k, v in self.profiles.items() if k not in gone}
+                profiles.update(added)
+                self.profiles = profiles
+        return {'added': sorted(added), 'removed': sorted(gone)}
+
+    def iter_accounts(self, client, page_size=None):
+        """
+        Summary:
+            generator, streams organization accounts one ListAccounts page
+            at a time
+
+        Arg:
+            organizations client object
+            page_size (int): MaxResults of each page (DEFAULT: service default)
+
+        Yields:
+            account | TYPE: dict (Id, Name, Status, ...)
+        """
+        params = {'MaxResults': page_size} if page_size else {}
+        while True:
+            response = self._call(client, 'list_accounts', **params)
+            for account in response['Accounts']:
+                yield account
+            if not response.get('NextToken'):
+                return
+            params['NextToken'] = response['NextToken']
+
+    def iter_users(self, client):
+        """
+        Summary:
+            generator, streams iam user names one list_users page at a time
+
+        Arg:
+            iam client object
+
+        Yields:
+            iam user name | TYPE: str
+        """
+        params = {}
+        while True:
+            response = self._call(client, 'list_users', **params)
+            for user in response['Users']:
+                yield user['UserName']
+            if not response.get('IsTruncated'):
+                return
+            params['Marker'] = response['Marker']
+
     def filter_args(self, kwarg_dict, *args):
         """
         Summary:
@@ -722,20 +1838,39 @@ class StsCore():
         Args:
             input_file (str): pathname of awscli credentails file
             output_file (str): name of json formatted output file, post awscli transformation
+            force_rewrite (bool): reparse and rewrite all profiles.  When False
+                the refactor is incremental: the input file is reparsed only if
+                it changed since the last refactor, and only added, removed or
+                modified profiles are written (see refactor.sync_awscli).  With
+                profile_store set, profiles are kept in a ProfileStore database
+                named after output_file, and self.profiles is that store
 
         Returns:
             TYPE Boolean | Success or Failure
         """
-        response = False
-
-        if not force_rewrite and os.path.exists(output_file):
-            # local awscli credentials already refactored
-            return True
-        else:
+        if self.profile_store:
+            store = ProfileStore(
+                self.config_dir + '/' + os.path.splitext(os.path.basename(output_file))[0] + '.db'
+            )
+            if force_rewrite:
+                store.clear()
+            response = sync_awscli(parameter_input=input_file, parameter_output=output_file,
+                                   store=store)
+        elif force_rewrite:
             # first-time local awscli refactor or force refresh of existing stslib obj profiles
             logger.info('%s: refactoring awscli credentials file' % inspect.stack()[0][3])
             response = parse_awscli(parameter_input=input_file, parameter_output=output_file)
-            if response:
-                self.profiles = self.parse_profiles(pre_name=input_file, post_name=output_file)
-                return True
+        else:
+            response = sync_awscli(parameter_input=input_file, parameter_output=output_file)
+        if response is False:
             return False
+        if isinstance(response, dict) and not any(response.values()) and \
+                getattr(self, '_profiles', None) is not None:
+            return True     # unchanged; profiles and alias index retained
+        if self.profile_store:
+            self.profiles = store       # profiles loaded on access
+        else:
+            self.profiles = self.parse_profiles(pre_name=input_file, post_name=output_file)
+        if getattr(self, 'discovery', None) is not None:
+            self._merge_discovered(self.discovery.accounts())
+        return True
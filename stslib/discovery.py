@@ -0,0 +1,129 @@
+"""
+Summary:
+    AWS Organizations account discovery.  Role profiles are synthesized for
+    every active account in the organization from a role arn template, so
+    that roles need not be listed one per profile in the awscli credentials
+    file.  The account list is cached in the stslib config directory and
+    re-read from organizations:ListAccounts only after the cache ttl expires;
+    profiles are then synthesized only for accounts new since the last run.
+
+Module Attributes:
+    - logger: logging object
+
+"""
+
+import re
+import json
+import time
+from stslib import logd
+from stslib.persist import write_atomic, read_json
+from stslib._version import __version__
+
+
+logger = logd.getLogger(__version__)
+
+
+class AccountDiscovery():
+    """
+    TTL cached organization account list and the role profiles derived
+    from it
+    """
+    def __init__(self, path, role_template, alias_template='{name}', ttl=86400):
+        """
+        Args:
+            :path (str): account cache file location
+            :role_template (str): role arn with {account} placeholder, e.g.
+                'arn:aws:iam::{account}:role/OrgAdmin'
+            :alias_template (str): profile alias; may use {account}, {name}
+                (account name) and {role} (role name from role_template)
+            :ttl (int): seconds the cached account list is used before
+                ListAccounts is called again
+        """
+        self.path = path
+        self.role_template = role_template
+        self.alias_template = alias_template
+        self.ttl = ttl
+
+    def _load(self):
+        """ cache content if written with the current templates, else {} """
+        content = read_json(self.path) or {}
+        if (content.get('role_template'), content.get('alias_template')) != \
+                (self.role_template, self.alias_template):
+            return {}
+        return content
+
+    def fresh(self):
+        """ True if the account cache is younger than ttl """
+        content = self._load()
+        return bool(content) and time.time() - content['updated'] < self.ttl
+
+    def accounts(self):
+        """
+        Returns:
+            cached accounts | TYPE: dict, account id: {'name', 'alias'}
+        """
+        return self._load().get('accounts', {})
+
+    def update(self, listed):
+        """
+        Summary:
+            records the accounts returned by ListAccounts.  Aliases of known
+            accounts are retained; aliases are assigned to new accounts only
+
+        Args:
+            :listed (iterable): ListAccounts 'Accounts' entries
+
+        Returns:
+            (added, removed) | TYPE: tuple of dicts, account id: entry
+        """
+        known = self.accounts()
+        active = {}
+        for account in listed:
+            if account.get('Status', 'ACTIVE') == 'ACTIVE':
+                active[account['Id']] = account['Name']
+        added = {k: v for k, v in active.items() if k not in known}
+        removed = {k: known[k] for k in known if k not in active}
+
+        accounts = {k: v for k, v in known.items() if k in active}
+        taken = set(entry['alias'] for entry in accounts.values())
+        for account_id in sorted(added):
+            alias = self._alias(account_id, added[account_id])
+            if alias in taken:
+                alias = '%s-%s' % (alias, account_id)    # duplicate account name
+            taken.add(alias)
+            accounts[account_id] = added[account_id] = {'name': added[account_id], 'alias': alias}
+
+        write_atomic(self.path, json.dumps({
+            'updated': time.time(),
+            'role_template': self.role_template,
+            'alias_template': self.alias_template,
+            'accounts': accounts
+        }, indent=4))
+        return added, removed
+
+    def _alias(self, account_id, name):
+        role = self.role_template.split('/')[-1]
+        alias = self.alias_template.format(account=account_id, name=name, role=role)
+        return re.sub(r'\s+', '-', alias.strip())
+
+    def profiles(self, accounts, source_profile, mfa_serial=''):
+        """
+        Summary:
+            role profiles, in the form parse_awscli produces, for accounts
+
+        Args:
+            :accounts (dict): account id: cache entry, e.g. from accounts()
+            :source_profile (str): profile whose session token assumes the roles
+            :mfa_serial (str): mfa device of source_profile
+
+        Returns:
+            TYPE: dict, alias: profile
+        """
+        return {
+            entry['alias']: {
+                'role_arn': self.role_template.format(account=account_id),
+                'mfa_serial': mfa_serial,
+                'source_profile': source_profile
+            }
+            for account_id, entry in accounts.items()
+        }
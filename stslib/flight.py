@@ -0,0 +1,141 @@
+"""
+Summary:
+    Single-flight de-duplication of assume_role calls.  When several callers
+    request credentials for the same role at once, one performs the Amazon STS
+    call and the others reuse its result.
+
+    - ThreadFlight:  within a process, concurrent requests for a role in
+      flight wait on the existing future
+    - ProcessFlight:  across processes, via a lock file per role and the shared
+      persistent credential cache
+
+Module Attributes:
+    - logger: logging object
+
+"""
+
+import os
+import inspect
+import threading
+from concurrent.futures import Future
+from stslib import logd
+from stslib.persist import FileLock
+from stslib._version import __version__
+
+
+logger = logd.getLogger(__version__)
+
+
+class ThreadFlight():
+    """
+    in-process request coalescing.  The first thread to request a key runs
+    the call; threads requesting the same key while it is in flight wait for
+    and share its result (or exception)
+    """
+    def __init__(self):
+        self.issued = 0         # calls executed
+        self.coalesced = 0      # requests served by a call already in flight
+        self._inflight = {}     # key: concurrent.futures.Future
+        self._lock = threading.Lock()
+
+    def run(self, key, func):
+        """
+        Args:
+            :key (str): request identity, e.g. prefixed profile alias
+            :func (callable): performs the call when no request is in flight
+
+        Returns:
+            return value of func, possibly from another thread's call
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.issued += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        """
+        Returns:
+            coalescing counters | TYPE: dict
+        """
+        with self._lock:
+            return {
+                'issued': self.issued,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._inflight)
+            }
+
+
+class ProcessFlight():
+    """
+    cross-process single flight.  The first process to lock a role calls STS
+    and writes the result to the shared cache; processes waiting on the lock
+    then read that result instead of calling STS themselves
+    """
+    def __init__(self, directory, cache, timeout):
+        """
+        Args:
+            :directory (str): location of per-role lock files
+            :cache (CredentialCache): result cache shared between processes
+            :timeout (float): seconds to wait for another process's result
+                before calling STS directly
+        """
+        self.directory = directory
+        self.cache = cache
+        self.timeout = timeout
+
+    def _lock(self, key):
+        return FileLock(
+            os.path.join(self.directory, key.replace(os.sep, '_') + '.lock'),
+            timeout=self.timeout
+        )
+
+    def run(self, key, func, after=None):
+        """
+        Summary:
+            returns credentials for key, calling func only if no other
+            process has produced them
+
+        Args:
+            :key (str): credential key, e.g. prefixed profile alias
+            :func (callable): performs the STS call, returns boto credentials
+            :after (datetime): Expiration of the credentials the caller
+                holds, if renewing them.  A cached entry is reused only if it
+                expires later, so a renewal never returns the credentials
+                it replaces
+
+        Returns:
+            boto format credentials | TYPE: dict
+        """
+        lock = self._lock(key)
+        if not lock.acquire():
+            logger.warning(
+                '%s: timeout waiting on %s after %ss, calling STS directly' %
+                (inspect.stack()[0][3], key, self.timeout))
+            return func()
+        try:
+            found = self.cache.credentials([key]).get(key)
+            if found and (after is None or found['Expiration'] > after):
+                return found            # produced by another process
+            credentials = func()
+            self.cache.save_credentials({key: credentials})
+            return credentials
+        finally:
+            lock.release()
@@ -0,0 +1,140 @@
+"""
+Summary:
+    Filesystem helpers for data stslib persists in its configuration
+    directory (typically ~/.stslib).  Files are written atomically and are
+    readable by the owner only.  FileLock serializes access to shared files
+    between processes and threads.
+
+Module Attributes:
+    - logger: logging object
+
+"""
+
+import os
+import json
+import time
+import fcntl
+import inspect
+import tempfile
+import threading
+from stslib import logd
+from stslib._version import __version__
+
+
+logger = logd.getLogger(__version__)
+
+
+def write_atomic(path, content, mode=0o600):
+    """
+    Summary:
+        writes content to a temporary file in the destination directory, then
+        renames it over path.  Readers never observe a partially written file
+
+    Args:
+        :path (str): destination file
+        :content (str or iterable of str): file content, or chunks of it
+            written as they are produced
+        :mode (int): file permissions (DEFAULT: owner read/write only)
+
+    Returns:
+        TYPE: Boolean | True if written
+    """
+    directory = os.path.dirname(path) or '.'
+    if not os.path.exists(directory):
+        os.makedirs(directory, 0o700)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for chunk in ([content] if isinstance(content, str) else content):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.critical(
+            '%s: problem writing file %s. Error %s' %
+            (inspect.stack()[0][3], path, str(e)))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    except Exception:
+        # content generator failed; destination left untouched
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return True
+
+
+def read_json(path):
+    """
+    Summary:
+        loads a json file written by write_atomic
+
+    Returns:
+        parsed content, or None if missing or malformed
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FileLock():
+    """
+    exclusive advisory lock (flock) on a lock file, usable as a context
+    manager.  Excludes other processes and other threads of this process
+    """
+    def __init__(self, path, timeout=None, poll=0.05):
+        """
+        Args:
+            :path (str): lock file location, created if missing
+            :timeout (float): seconds to wait for the lock; None waits forever
+            :poll (float): seconds between attempts while waiting
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll = poll
+        self._fd = None
+        self._thread_lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Returns:
+            TYPE: Boolean | True if acquired, False if timeout expired
+        """
+        start = time.monotonic()
+        # threads sharing this instance serialize before contending for flock
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            return False
+        directory = os.path.dirname(self.path) or '.'
+        if not os.path.exists(directory):
+            os.makedirs(directory, 0o700)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return True
+            except (BlockingIOError, PermissionError):
+                if self.timeout is not None and time.monotonic() - start >= self.timeout:
+                    os.close(fd)
+                    self._thread_lock.release()
+                    return False
+                time.sleep(self.poll)
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError('timeout acquiring lock %s' % self.path)
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -0,0 +1,174 @@
+"""
+Summary:
+    Multi-identity source pool.  Several source profiles, each holding its
+    own session token, share the assume_role calls of one credential request
+    so that no single iam user's STS quota or latency bounds throughput.
+
+    Each call is issued with the identity having the fewest calls in flight,
+    ties going to the identity with the fewest calls made.  An identity
+    whose token has expired, which is throttled, or whose call fails on a
+    connection or timeout error, is set aside and the call fails over to the
+    next identity; only the last identity available to a call retries under
+    the full retry policy.
+
+Module Attributes:
+    - logger: logging object
+    - NO_IDENTITY: error code of the ClientError raised when no identity
+      in the pool holds a valid session token
+
+"""
+
+import time
+import datetime
+import inspect
+import threading
+import pytz
+from botocore.exceptions import ClientError
+from stslib import logd
+from stslib.results import EXPIRED_CODES, RETRYABLE_ERRORS, error_code, is_retryable
+from stslib.statics import defaults
+from stslib._version import __version__
+
+
+logger = logd.getLogger(__version__)
+
+
+NO_IDENTITY = 'NoIdentityAvailable'
+
+
+class IdentityPool():
+    """
+    source identities, typically StsCore instances, among which assume_role
+    calls are balanced.  An identity exposes profile_user, token (STSToken)
+    and _token_client(token)
+    """
+    def __init__(self, identities, cooldown=defaults['identity_cooldown']):
+        """
+        Args:
+            :identities (list): source identities; profile_user must be unique
+            :cooldown (int): seconds a throttled identity is passed over
+        """
+        self.identities = list(identities)
+        self.cooldown = cooldown
+        self._stats = {
+            x.profile_user: {'calls': 0, 'throttled': 0, 'unreachable': 0,
+                             'expired': 0, 'failovers': 0, 'in_flight': 0}
+            for x in self.identities
+        }
+        self._cooling = {}          # profile_user: monotonic time cooldown ends
+        self._expired = {}          # profile_user: access key of rejected token
+        self._lock = threading.Lock()
+
+    def _live(self, identity, now):
+        """ True if identity holds an unexpired token not rejected by STS """
+        token = identity.token
+        end = getattr(token, 'end', None)
+        if not end or now >= end:
+            return False
+        return self._expired.get(identity.profile_user) != token.access_key
+
+    def live(self):
+        """ profile_user of identities holding a valid session token | TYPE: list """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        return [x.profile_user for x in self.identities if self._live(x, now)]
+
+    def _candidates(self, exclude):
+        """ identities eligible for a call, least loaded first """
+        now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+        clock = time.monotonic()
+        live = [
+            x for x in self.identities
+            if x.profile_user not in exclude and self._live(x, now)
+        ]
+        ready = [x for x in live if self._cooling.get(x.profile_user, 0) <= clock]
+        # every live identity cooling: the one cooled longest is tried
+        candidates = ready or sorted(live, key=lambda x: self._cooling[x.profile_user])[:1]
+        return sorted(
+            candidates,
+            key=lambda x: (self._stats[x.profile_user]['in_flight'],
+                           self._stats[x.profile_user]['calls'])
+        )
+
+    def call(self, func, *args, **kwargs):
+        """
+        Summary:
+            invokes func with an sts client of the least loaded identity,
+            failing over to another identity on throttling, a connection or
+            timeout error, or an expired token
+
+        Args:
+            :func (callable): called as func(client, *args, attempts=n,
+                **kwargs); attempts is 1 while other identities remain to
+                fail over to, None (full retry policy) for the last
+            :args, kwargs: further parameters passed to func
+
+        Returns:
+            response of func
+
+        Raises:
+            ClientError | final error, or NO_IDENTITY when no identity holds
+            a valid session token.  A connection or timeout error of the last
+            identity is re-raised as it is
+        """
+        tried = set()
+        while True:
+            with self._lock:
+                candidates = self._candidates(tried)
+                if candidates:
+                    identity = candidates[0]
+                    name = identity.profile_user
+                    self._stats[name]['calls'] += 1
+                    self._stats[name]['in_flight'] += 1
+            if not candidates:
+                raise ClientError(
+                    {'Error': {
+                        'Code': NO_IDENTITY,
+                        'Message': 'no identity in pool %s holds a valid session token' %
+                                   [x.profile_user for x in self.identities]}},
+                    getattr(func, '__name__', 'unknown')
+                )
+            token = identity.token
+            last = len(candidates) == 1
+            try:
+                return func(
+                    identity._token_client(token), *args,
+                    attempts=None if last else 1, **kwargs
+                )
+            except (ClientError,) + RETRYABLE_ERRORS as e:
+                code = error_code(e)
+                if not is_retryable(e) and code not in EXPIRED_CODES:
+                    raise           # not specific to this identity
+                self._set_aside(name, token, e)
+                if last:
+                    raise
+                logger.info(
+                    '%s: %s returned %s, failing over' %
+                    (inspect.stack()[0][3], name, code))
+                with self._lock:
+                    self._stats[name]['failovers'] += 1
+                tried.add(name)
+            finally:
+                with self._lock:
+                    self._stats[name]['in_flight'] -= 1
+
+    def _set_aside(self, name, token, error):
+        """ records an identity-level failure """
+        with self._lock:
+            if error_code(error) in EXPIRED_CODES:
+                self._stats[name]['expired'] += 1
+                self._expired[name] = token.access_key     # until a new token is set
+                return
+            elif isinstance(error, ClientError):
+                self._stats[name]['throttled'] += 1
+            else:
+                self._stats[name]['unreachable'] += 1
+            self._cooling[name] = time.monotonic() + self.cooldown
+
+    def stats(self):
+        """
+        Returns:
+            per-identity counters | TYPE: dict, profile_user: {'calls',
+            'throttled', 'unreachable', 'expired', 'failovers', 'in_flight'}
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
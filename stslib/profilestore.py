@@ -0,0 +1,187 @@
+"""
+Summary:
+    SQLite backed profile store, an alternative to loading profiles.json
+    whole.  Profiles are indexed by alias, account id (parsed from role_arn),
+    source_profile and mfa_serial and are read from disk one at a time as
+    they are accessed, so StsCore startup time and memory do not grow with
+    the number of profiles.
+
+    ProfileStore implements the read-only Mapping interface of the profiles
+    dict it replaces:  store[alias], alias in store, store.keys()
+
+    refactor.sync_awscli keeps the store current: the input file signature
+    and a hash of each profile are held alongside the profiles, so only
+    added, removed or modified profiles are written when the input changes.
+
+Module Attributes:
+    - SCHEMA: sql statements creating the store's tables and indexes
+
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS profiles (
+        alias TEXT PRIMARY KEY,
+        account_id TEXT,
+        source_profile TEXT,
+        mfa_serial TEXT,
+        hash TEXT,
+        profile TEXT NOT NULL
+    )""",
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS profiles_account_id ON profiles (account_id)',
+    'CREATE INDEX IF NOT EXISTS profiles_source_profile ON profiles (source_profile)',
+    'CREATE INDEX IF NOT EXISTS profiles_mfa_serial ON profiles (mfa_serial)'
+)
+
+
+def account_id(profile):
+    """ account id of a role profile's role_arn; None for iam user profiles """
+    role_arn = profile.get('role_arn')
+    return role_arn.split(':')[4] if role_arn else None
+
+
+class ProfileStore(Mapping):
+    """
+    indexed, lazily loaded store of parsed awscli profiles.  Each thread uses
+    its own sqlite connection; writes are made in a single transaction
+    """
+    def __init__(self, path):
+        """
+        Args:
+            :path (str): database file location, created if missing
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            for statement in SCHEMA:
+                db.execute(statement)
+
+    def _connect(self):
+        """ this thread's connection to the database """
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            directory = os.path.dirname(self.path) or '.'
+            if not os.path.exists(directory):
+                os.makedirs(directory, 0o700)
+            db = sqlite3.connect(self.path)
+            os.chmod(self.path, 0o600)
+            self._local.db = db
+        return db
+
+    def __getitem__(self, alias):
+        row = self._connect().execute(
+            'SELECT profile FROM profiles WHERE alias = ?', (alias,)).fetchone()
+        if row is None:
+            raise KeyError(alias)
+        return json.loads(row[0])
+
+    def __contains__(self, alias):
+        return self._connect().execute(
+            'SELECT 1 FROM profiles WHERE alias = ?', (alias,)).fetchone() is not None
+
+    def __iter__(self):
+        for row in self._connect().execute('SELECT alias FROM profiles ORDER BY alias'):
+            yield row[0]
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM profiles').fetchone()[0]
+
+    def items(self):
+        """ (alias, profile) pairs read in a single query """
+        for alias, profile in self._connect().execute(
+                'SELECT alias, profile FROM profiles ORDER BY alias'):
+            yield alias, json.loads(profile)
+
+    def _select(self, column, value):
+        return [
+            row[0] for row in self._connect().execute(
+                'SELECT alias FROM profiles WHERE %s = ? ORDER BY alias' % column, (value,))
+        ]
+
+    def by_account(self, account):
+        """ aliases of roles in account id | TYPE: list """
+        return self._select('account_id', str(account))
+
+    def by_source(self, source_profile):
+        """ aliases of roles assumed from source_profile | TYPE: list """
+        return self._select('source_profile', source_profile)
+
+    def by_mfa(self, mfa_serial):
+        """ aliases of profiles secured by mfa_serial | TYPE: list """
+        return self._select('mfa_serial', mfa_serial)
+
+    def update(self, profiles, removed=(), hashes=None):
+        """
+        Summary:
+            adds or replaces profiles and deletes removed aliases in one
+            transaction
+
+        Args:
+            :profiles (iterable): (alias, profile dict) pairs, or a dict
+            :removed (iterable): aliases to delete
+            :hashes (dict): alias: section hash recorded by sync_awscli
+
+        Returns:
+            TYPE: Boolean | True when committed
+        """
+        if isinstance(profiles, dict):
+            profiles = profiles.items()
+        hashes = hashes or {}
+        with self._connect() as db:
+            db.executemany('DELETE FROM profiles WHERE alias = ?', ((a,) for a in removed))
+            db.executemany(
+                'INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    (alias, account_id(profile), profile.get('source_profile'),
+                     profile.get('mfa_serial'), hashes.get(alias), json.dumps(profile))
+                    for alias, profile in profiles
+                )
+            )
+        return True
+
+    def clear(self):
+        """ deletes all profiles and the recorded input signature """
+        with self._connect() as db:
+            db.execute('DELETE FROM profiles')
+            db.execute('DELETE FROM meta')
+
+    # --- sync_awscli target interface ----------------------------------------
+
+    def signature(self):
+        """ input file signature of the last sync | TYPE: dict or None """
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def hashes(self):
+        """
+        section hash of each profile parsed from the input file | TYPE: dict.
+        Profiles added by other means (hash NULL, e.g. account discovery) are
+        excluded, so sync_awscli never reports them removed
+        """
+        return dict(self._connect().execute(
+            'SELECT alias, hash FROM profiles WHERE hash IS NOT NULL'))
+
+    def apply(self, parsed, removed, signature, hashes=None, index=None, rebuild=False):
+        """
+        records a sync: changed profiles and the new input signature.  On a
+        rebuild (input file changed) every profile parsed from the previous
+        input is deleted; discovered profiles are kept
+        """
+        if rebuild:
+            removed = set(removed) | set(self.hashes())
+        self.update(parsed, removed, hashes)
+        self.touch(signature)
+
+    def touch(self, signature):
+        """ records the input signature of a sync which changed no profiles """
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (json.dumps(signature),))
@@ -0,0 +1,94 @@
+"""
+Summary:
+    Client-side token bucket rate limiter for Amazon STS and IAM api calls.
+    A single RateLimiter may be shared by any number of StsCore instances and
+    threads to hold aggregate request rate under the account-wide STS quota.
+
+Module Attributes:
+    None
+
+Example Use:
+
+    limiter = RateLimiter(rate=50, burst=100)
+    sts_a = StsCore(profile_name='ops', rate_limiter=limiter)
+    sts_b = StsCore(profile_name='audit', rate_limiter=limiter)
+    limiter.stats()
+
+"""
+
+import time
+import functools
+import threading
+
+
+class RateLimiter():
+    """
+    token bucket refilled at rate permits per second, holding at most burst
+    permits.  Permits are reserved in arrival order: a caller arriving when
+    the bucket is empty sleeps exactly until its permit has accrued
+    """
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            :rate (float): sustained permits per second
+            :burst (int): bucket capacity (DEFAULT: rate, min 1)
+        """
+        if rate <= 0:
+            raise ValueError('rate must be greater than zero')
+        self.rate = float(rate)
+        self.burst = int(burst or max(1, rate))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.granted = 0                 # permits issued
+        self.wait_seconds = 0.0          # cumulative time callers spent waiting
+        self.queue_depth = 0             # callers currently waiting
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Summary:
+            blocks until a permit is available
+
+        Returns:
+            seconds waited | TYPE: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.granted += 1
+            self.wait_seconds += wait
+            if wait:
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if wait:
+            time.sleep(wait)
+            with self._lock:
+                self.queue_depth -= 1
+        return wait
+
+    def limit(self, func):
+        """ wraps func so that each invocation first acquires a permit """
+        @functools.wraps(func)
+        def limited(*args, **kwargs):
+            self.acquire()
+            return func(*args, **kwargs)
+        return limited
+
+    def stats(self):
+        """
+        Returns:
+            limiter counters | TYPE: dict
+        """
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'granted': self.granted,
+                'wait_seconds': self.wait_seconds,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth
+            }
@@ -1,6 +1,23 @@
 #!/usr/bin/env python3
 """ refactor Module Level comments NEEDED HERE
 
+    - parse_awscli:  full parse of an awscli credentials file to json
+    - sync_awscli:  incremental parse; the input file's signature and a hash
+      of each profile section are kept in a sidecar file next to the output,
+      so the input is re-read only when it changed and only added, removed
+      or modified profiles are written
+    - lookup_profile:  reads a single profile via the byte offset index kept
+      in the sidecar, without parsing the rest of the file
+
+    sync_awscli can instead maintain a ProfileStore (stslib.profilestore), an
+    indexed sqlite database read one profile at a time.
+
+    Credentials files are parsed in a single streaming pass (iter_profiles):
+    sections are filtered and classified as they are read and the json output
+    is written as it is produced, so memory use does not grow with file size.
+    The pass is preceded by a line scan for a DEFAULT section, whose keys
+    every profile inherits as it does under configparser and botocore.
+
 Module Attributes:
     logger - logging object
 
@@ -9,11 +26,13 @@ Module Attributes:
 
 import os
 import json
-import configparser
+import hashlib
+import itertools
 import sys
 import argparse
 import inspect
 from stslib import logd
+from stslib.persist import write_atomic, read_json
 from stslib.statics import defaults, global_config
 from stslib._version import __version__
 
@@ -25,10 +44,173 @@ logger = logd.getLogger(__version__)
 config_dir = defaults['config_path']
 prefix = global_config['credential_prefix']
 prefix_alt = global_config['alternate_prefix']
+iam_keys = ['aws_access_key_id', 'aws_secret_access_key']
+role_keys = ['role_arn', 'mfa_serial', 'source_profile']
 
 
 # -- function declarations  ---------------------------------------------------
 
+def _paths(parameter_input=None, parameter_output=None):
+    """ resolves (awscli input file, json output file) as parse_awscli does """
+    awscli_file = parameter_input or defaults['default_awscli']
+    output_file = parameter_output or defaults['output_file']
+    if config_dir not in output_file:
+        output_file = config_dir + '/' + output_file
+    return awscli_file, output_file
+
+
+def _included(name):
+    """ False for the DEFAULT section and sections holding stslib credentials """
+    return name != 'DEFAULT' and prefix not in name and prefix_alt not in name
+
+
+def classify(items, name=''):
+    """
+    Summary:
+        reduces a profile section to its iam user keys or role keys.  A
+        duration_seconds which is not an integer is logged and ignored
+
+    Args:
+        items (dict): key: value pairs of one section
+        name (str): section name, for logging
+
+    Returns:
+        TYPE: dict, empty if the section is neither an iam user nor a role
+    """
+    profile = {}
+    if set(iam_keys).issubset(items):
+        for key in iam_keys:
+            profile[key] = items[key]
+        if 'mfa_serial' in items:    # mfa secured cli
+            profile['mfa_serial'] = items['mfa_serial']
+
+    elif set(role_keys).issubset(items):
+        for key in role_keys:
+            profile[key] = items[key]
+        if 'duration_seconds' in items:
+            try:
+                profile['duration_seconds'] = int(items['duration_seconds'])
+            except ValueError:
+                logger.warning(
+                    '%s: profile %s duration_seconds %r is not an integer, ignored' %
+                    (inspect.stack()[0][3], name, items['duration_seconds']))
+    return profile
+
+
+def iter_sections(lines, offset=0):
+    """
+    Summary:
+        single pass ini tokenizer.  Keys are lower cased and values stripped
+        as configparser does; indented lines continue the previous value
+
+    Args:
+        lines (iterable): lines of the file as bytes, e.g. an open binary file
+        offset (int): byte position of the first line
+
+    Yields:
+        (section name, byte offset, byte length, items dict) in file order
+    """
+    name, start, items, key = None, offset, {}, None
+    pos = offset
+    for line in lines:
+        text = line.decode('utf-8').strip()
+        if text.startswith('[') and text.endswith(']'):
+            if name is not None:
+                yield name, start, pos - start, items
+            name, start, items, key = text[1:-1].strip(), pos, {}, None
+        elif name is None or not text or text[0] in '#;':
+            pass
+        elif line[:1] in (b' ', b'\t') and key is not None:
+            items[key] += '\n' + text
+        else:
+            sep = min(i for i in (text.find('='), text.find(':'), len(text)) if i >= 0)
+            key = text[:sep].strip().lower()
+            items[key] = text[sep + 1:].strip()
+        pos += len(line)
+    if name is not None:
+        yield name, start, pos - start, items
+
+
+def default_section(awscli_file):
+    """
+    Summary:
+        locates the DEFAULT section, whose keys every other section inherits
+        as configparser and botocore read them.  Only DEFAULT is parsed
+
+    Returns:
+        (items dict, byte offset, byte length) | ({}, None, None) if absent
+    """
+    with open(awscli_file, 'rb') as f:
+        pos = 0
+        for line in f:
+            if line.strip() == b'[DEFAULT]':
+                _, offset, length, items = next(iter_sections(itertools.chain([line], f), pos))
+                return items, offset, length
+            pos += len(line)
+    return {}, None, None
+
+
+def _inherit(inherited, items):
+    """ section items over the DEFAULT section's items """
+    merged = dict(inherited)
+    merged.update(items)
+    return merged
+
+
+def _section_at(f, offset, length):
+    """ items of the section at an indexed byte range of open file f """
+    f.seek(offset)
+    for _, _, _, items in iter_sections(f.read(length).splitlines(True), offset):
+        return items
+    return {}
+
+
+def iter_profiles(awscli_file, inherited=None):
+    """
+    Summary:
+        streams the profiles of an awscli credentials file, filtered and
+        classified as they are read.  Keys of the DEFAULT section are
+        inherited by each profile
+
+    Args:
+        awscli_file (str): credentials file
+        inherited (dict): DEFAULT section items, if already read
+
+    Yields:
+        (profile name, profile dict, byte offset, byte length)
+    """
+    if inherited is None:
+        inherited = default_section(awscli_file)[0]
+    with open(awscli_file, 'rb') as f:
+        for name, offset, length, items in iter_sections(f):
+            if _included(name):
+                yield name, classify(_inherit(inherited, items), name), offset, length
+
+
+def _json_chunks(profiles):
+    """ json.dumps(dict(profiles), indent=4), produced a profile at a time """
+    separator = '{\n'
+    for name, profile in profiles:
+        yield separator + '    %s: %s' % (
+            json.dumps(name), json.dumps(profile, indent=4).replace('\n', '\n    '))
+        separator = ',\n'
+    yield '{}' if separator == '{\n' else '\n}'
+
+
+def file_hash(path, blocksize=1 << 20):
+    """ sha256 of a file, read in blocks """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def section_hash(profile):
+    """ sha256 of a parsed profile section, independent of key order """
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode('utf-8')).hexdigest()
+
+
 def parse_awscli(parameter_input=None, parameter_output=None):
     """
     Summary:
@@ -41,19 +223,12 @@ def parse_awscli(parameter_input=None, parameter_output=None):
     Returns:
         Success or Failure, TYPE: Boolean
     """
-    # input file - to be parsed
-    awscli_file = parameter_input or defaults['default_awscli']
-    # ouput file - after parsing
-    if config_dir in parameter_output:
-        output_file = (parameter_output or defaults['output_file'])
-    else:
-        output_file = config_dir + '/' + (parameter_output or defaults['output_file'])
+    # input file - to be parsed; ouput file - after parsing
+    awscli_file, output_file = _paths(parameter_input, parameter_output)
 
     logger.info('awscli_file (input) is: %s' % awscli_file)
     logger.info('output_file is: %s' % output_file)
 
-    total_dict, tmp = {}, {}
-
     if not os.path.exists(awscli_file):
         logger.info(
             'awscli credentials or provided file input [%s] missing. Abort' %
@@ -64,42 +239,21 @@ def parse_awscli(parameter_input=None, parameter_output=None):
         logger.info('Configuration dir [%s] missing, creating it' % config_dir)
         os.mkdir(config_dir)
 
-    config = configparser.ConfigParser()
-    config.read(awscli_file)
-
-    iam_keys = ['aws_access_key_id', 'aws_secret_access_key']
-    role_keys = ['role_arn', 'mfa_serial', 'source_profile']
-
-    filtered_list = list(filter(lambda x: prefix_alt not in x,
-                        filter(lambda x: prefix not in x, config.sections())))
-
     try:
-        for profile in filtered_list:
-            if set(iam_keys).issubset(config[profile].keys()):
-                for key in iam_keys:
-                    tmp[key] = config[profile][key]
-                if 'mfa_serial' in config[profile].keys():    # mfa secured cli
-                    tmp['mfa_serial'] = config[profile]['mfa_serial']
-
-            elif set(role_keys).issubset(config[profile].keys()):
-                for key in role_keys:
-                    tmp[key] = config[profile][key]
-
-            total_dict[profile] = tmp
-            tmp = {}
-
-        # write output file
-        with open(output_file, 'w') as f2:
-            f2.write(json.dumps(total_dict, indent=4))
-            f2.close()
-
-        # secure file permissions
-        os.chmod(output_file, 0o700)
+        # stream profiles from input to output file, secure file permissions
+        profiles = ((name, profile) for name, profile, _, _ in iter_profiles(awscli_file))
+        if not write_atomic(output_file, _json_chunks(profiles), mode=0o700):
+            return False
 
+    except (UnicodeDecodeError, ValueError) as e:
+        logger.critical(
+            '%s: problem parsing file %s. Error %s' %
+            (inspect.stack()[0][3], awscli_file, str(e)))
+        return False
     except KeyError as e:
         logger.critical(
             '%s: Cannot find Key %s while parsing file %s' %
-            (inspect.stack()[0][3], str(e), input_file))
+            (inspect.stack()[0][3], str(e), awscli_file))
         return False
     except OSError as e:
         logger.critical(
@@ -114,6 +268,172 @@ def parse_awscli(parameter_input=None, parameter_output=None):
     return True
 
 
+class _JsonTarget():
+    """
+    sync_awscli target writing profiles.json; signature, section hashes and
+    the section offset index are kept in a json sidecar (output + '.state')
+    """
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.sidecar = output_file + '.state'
+        self.state = read_json(self.sidecar) or {}
+
+    def signature(self):
+        if not self.state or not os.path.exists(self.output_file):
+            return None
+        return self.state
+
+    def hashes(self):
+        return self.state.get('sections', {})
+
+    def apply(self, parsed, removed, signature, hashes, index, rebuild=False):
+        if parsed or removed or rebuild:
+            if rebuild or not self.signature():
+                profiles = {}
+            else:
+                profiles = read_json(self.output_file) or {}
+            for name in removed:
+                profiles.pop(name, None)
+            profiles.update(parsed)
+            write_atomic(self.output_file, _json_chunks(profiles.items()), mode=0o700)
+        self.state = dict(signature, sections=hashes, index=index)
+        write_atomic(self.sidecar, json.dumps(self.state, indent=4))
+
+    def touch(self, signature):
+        self.state.update(signature)
+        write_atomic(self.sidecar, json.dumps(self.state, indent=4))
+
+
+def sync_awscli(parameter_input=None, parameter_output=None, store=None):
+    """
+    Summary:
+        incremental form of parse_awscli.  The input file's mtime, size and
+        sha256 and the hash of each parsed profile are recorded with the
+        output.  The input is not read while mtime and size are unchanged,
+        not parsed while its content hash is unchanged, and only profiles
+        which were added, removed or modified are written.  When the input
+        path differs from the one last synced the output is rebuilt: all
+        profiles are reported added, and those of the previous input which
+        are absent from the new one removed
+
+    Args:
+        parameter_input: TYPE: string, opt input file if not awscli default
+        parameter_output: TYPE: string, opt ouput file if not stslib default;
+            state is kept in a sidecar, output file + '.state'
+        store: TYPE: ProfileStore, opt; profiles and state are written to the
+            store instead of the output file
+
+    Returns:
+        profile names by change | TYPE: dict with keys added, removed,
+        modified (lists); False on failure
+    """
+    awscli_file, output_file = _paths(parameter_input, parameter_output)
+    target = store if store is not None else _JsonTarget(output_file)
+    changes = {'added': [], 'removed': [], 'modified': []}
+
+    try:
+        stat = os.stat(awscli_file)
+    except OSError:
+        logger.info(
+            'awscli credentials or provided file input [%s] missing. Abort' %
+            awscli_file
+        )
+        return False
+
+    state = target.signature() or {}
+    rebuild = state.get('input') != os.path.abspath(awscli_file)
+    if rebuild:
+        state = {}                      # no usable prior parse
+    elif (state['mtime'], state['size']) == (stat.st_mtime, stat.st_size):
+        return changes
+
+    try:
+        signature = {
+            'input': os.path.abspath(awscli_file),
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'sha256': file_hash(awscli_file)
+        }
+        if signature['sha256'] == state.get('sha256'):
+            target.touch(signature)
+            return changes
+
+        previous = target.hashes()      # profiles held from the last sync
+        sections = {} if rebuild else previous
+        hashes, index, parsed = {}, {}, {}
+        inherited, offset, length = default_section(awscli_file)
+        if offset is not None:
+            index['DEFAULT'] = [offset, length]
+        for name, profile, offset, length in iter_profiles(awscli_file, inherited):
+            hashes[name] = section_hash(profile)
+            index[name] = [offset, length]
+            if hashes[name] != sections.get(name):
+                parsed[name] = profile      # added or modified only
+
+        changes['removed'] = sorted(set(previous) - set(hashes))
+        changes['added'] = sorted(set(parsed) - set(sections))
+        changes['modified'] = sorted(set(parsed) & set(sections))
+        if parsed or changes['removed']:
+            logger.info(
+                '%s: %s profiles added %s, removed %s, modified %s' %
+                (inspect.stack()[0][3], getattr(store, 'path', output_file),
+                 changes['added'], changes['removed'], changes['modified']))
+        target.apply(parsed, changes['removed'], signature, hashes, index, rebuild)
+
+    except (UnicodeDecodeError, ValueError) as e:
+        logger.critical(
+            '%s: problem parsing file %s. Error %s' %
+            (inspect.stack()[0][3], awscli_file, str(e)))
+        return False
+    except OSError as e:
+        logger.critical(
+            '%s: problem opening file %s. Error %s' %
+            (inspect.stack()[0][3], awscli_file, str(e)))
+        return False
+    return changes
+
+
+def lookup_profile(name, parameter_input=None, parameter_output=None):
+    """
+    Summary:
+        reads a single profile from an awscli credentials file.  When the
+        sidecar written by sync_awscli matches the input file, only the
+        indexed byte range of the profile is read; otherwise the file is
+        streamed until the profile is found
+
+    Args:
+        name (str): profile name
+        parameter_input: TYPE: string, opt input file if not awscli default
+        parameter_output: TYPE: string, opt ouput file if not stslib default
+
+    Returns:
+        classified profile | TYPE: dict, or None if absent or filtered
+    """
+    awscli_file, output_file = _paths(parameter_input, parameter_output)
+    try:
+        stat = os.stat(awscli_file)
+        state = read_json(output_file + '.state') or {}
+        if (state.get('input') == os.path.abspath(awscli_file) and 'index' in state and
+                (state['mtime'], state['size']) == (stat.st_mtime, stat.st_size)):
+            if name not in state['index'] or not _included(name):
+                return None
+            with open(awscli_file, 'rb') as f:
+                inherited = {}
+                if 'DEFAULT' in state['index']:
+                    inherited = _section_at(f, *state['index']['DEFAULT'])
+                items = _section_at(f, *state['index'][name])
+            return classify(_inherit(inherited, items), name)
+        # no valid index; scan
+        for section, profile, _, _ in iter_profiles(awscli_file):
+            if section == name:
+                return profile
+    except OSError as e:
+        logger.critical(
+            '%s: problem opening file %s. Error %s' %
+            (inspect.stack()[0][3], awscli_file, str(e)))
+    return None
+
+
 if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description='stslib credential data build')
@@ -0,0 +1,166 @@
+"""
+Summary:
+    Result containers for bulk credential generation.  Each role assumed
+    in a batch is recorded as an individual success or failure so that
+    successful credentials are retained when other roles in the same batch
+    fail, and only the failed subset need be re-attempted.
+
+    - RoleResult:  outcome of a single assume_role call
+    - RoleResults:  collection of RoleResult objects for one batch
+
+Module Attributes:
+    - RETRYABLE_CODES: Amazon error codes for which a retry may succeed
+    - EXPIRED_CODES: Amazon error codes rejecting the caller's session token
+    - RETRYABLE_ERRORS: botocore connection and timeout exceptions, raised
+      instead of a ClientError, for which a retry may succeed
+
+"""
+
+from botocore import exceptions
+from botocore.exceptions import ClientError
+
+
+RETRYABLE_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'ServiceUnavailable',
+    'InternalFailure',
+    'InternalError',
+    'RequestTimeout',
+    'IDPCommunicationError'
+])
+
+
+EXPIRED_CODES = frozenset([
+    'ExpiredToken',
+    'ExpiredTokenException',
+    'InvalidClientTokenId'
+])
+
+
+RETRYABLE_ERRORS = (exceptions.ConnectionError, exceptions.HTTPClientError)
+
+
+def error_code(error):
+    """ Amazon error code of a ClientError, else the exception class name """
+    if isinstance(error, ClientError):
+        return error.response['Error']['Code']
+    return type(error).__name__
+
+
+def is_retryable(error):
+    """ True if a retry of the call which raised error may succeed """
+    if isinstance(error, ClientError):
+        return error_code(error) in RETRYABLE_CODES
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class RoleResult():
+    """
+    outcome of a single assume_role call
+    """
+    def __init__(self, alias, credentials=None, error=None):
+        """
+        Args:
+            :alias (str): profile name of the role
+            :credentials (STSingleSet): temporary credentials, if successful
+            :error (Exception): exception raised by the call, if unsuccessful
+        """
+        self.alias = alias
+        self.credentials = credentials
+        self.error = error
+        self.code = ''
+        self.message = ''
+        self.retryable = False
+        if isinstance(error, ClientError):
+            self.code = error.response['Error']['Code']
+            self.message = error.response['Error']['Message']
+        elif error is not None:
+            self.code = type(error).__name__
+            self.message = str(error)
+        if error is not None:
+            self.retryable = is_retryable(error)
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.success:
+            return 'RoleResult(%s, expiration=%s)' % (self.alias, self.credentials.expiration)
+        return 'RoleResult(%s, code=%s, retryable=%s)' % (self.alias, self.code, self.retryable)
+
+
+class RoleResults():
+    """
+    per-role successes and failures of a bulk credential request
+    """
+    def __init__(self):
+        self.successes = {}     # alias: RoleResult
+        self.failures = {}      # alias: RoleResult
+
+    def add(self, alias, outcome):
+        """
+        records the outcome of one role, replacing any earlier outcome
+
+        Args:
+            :alias (str): profile name of the role
+            :outcome (STSingleSet | Exception): value yielded by StsCore._fan_out
+
+        Returns:
+            TYPE: RoleResult
+        """
+        if isinstance(outcome, Exception):
+            result = RoleResult(alias, error=outcome)
+            self.failures[alias] = result
+            self.successes.pop(alias, None)
+        else:
+            result = RoleResult(alias, credentials=outcome)
+            self.successes[alias] = result
+            self.failures.pop(alias, None)
+        return result
+
+    def merge(self, other):
+        """ returns new RoleResults; outcomes in other supersede those in self """
+        merged = RoleResults()
+        for source in (self, other):
+            for alias, result in source.successes.items():
+                merged.failures.pop(alias, None)
+                merged.successes[alias] = result
+            for alias, result in source.failures.items():
+                merged.successes.pop(alias, None)
+                merged.failures[alias] = result
+        return merged
+
+    def retryable(self):
+        """ aliases of failed roles whose error code permits a retry """
+        return [alias for alias, result in self.failures.items() if result.retryable]
+
+    def credentials(self, prefix=''):
+        """
+        successful credentials in native boto format
+
+        Args:
+            :prefix (str): prepended to each alias to form the credential key
+
+        Returns:
+            TYPE: dict
+        """
+        return {
+            prefix + alias: result.credentials.boto
+            for alias, result in self.successes.items()
+        }
+
+    @property
+    def complete(self):
+        """ True when no role in the batch failed """
+        return not self.failures
+
+    def __len__(self):
+        return len(self.successes) + len(self.failures)
+
+    def __repr__(self):
+        return 'RoleResults(successes=%d, failures=%d, retryable=%d)' % (
+            len(self.successes), len(self.failures), len(self.retryable()))
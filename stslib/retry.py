@@ -0,0 +1,188 @@
+"""
+Summary:
+    Retry policy applied to Amazon STS and IAM api calls made by StsCore.
+    Throttling, transient service errors and connection or read timeouts are
+    retried with exponential backoff and full jitter.  A circuit breaker per account stops calls to an
+    account which repeatedly fails so that it cannot stall a refresh cycle.
+
+    - RetryPolicy:  backoff, attempt and elapsed time limits
+    - CircuitBreaker:  consecutive failure tracking for a single account
+
+Module Attributes:
+    - logger: logging object
+    - CIRCUIT_OPEN: error code of the ClientError raised when a circuit is open
+
+"""
+
+import time
+import random
+import threading
+from botocore.exceptions import ClientError
+from stslib import logd
+from stslib.results import EXPIRED_CODES, RETRYABLE_ERRORS, error_code, is_retryable
+from stslib.statics import defaults
+from stslib._version import __version__
+
+
+logger = logd.getLogger(__version__)
+
+
+CIRCUIT_OPEN = 'CircuitOpen'
+
+
+class CircuitBreaker():
+    """
+    opens after threshold consecutive failures; after reset_timeout seconds
+    a single trial call is permitted (half open) which closes the circuit
+    on success or re-opens it on failure
+    """
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened is None:
+            return 'closed'
+        elif time.monotonic() - self.opened >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """ True if a call may proceed """
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            elif state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened = None
+            self._trial = False
+
+    def release(self):
+        """ ends a half open trial without recording its outcome """
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.threshold:
+                self.opened = time.monotonic()
+
+
+class RetryPolicy():
+    """
+    exponential backoff with full jitter for retryable api errors
+    """
+    def __init__(self, max_attempts=defaults['retry_max_attempts'],
+                 max_elapsed=defaults['retry_max_elapsed'], base=0.2, cap=10,
+                 breaker_threshold=defaults['breaker_threshold'],
+                 breaker_reset=defaults['breaker_reset']):
+        """
+        Args:
+            :max_attempts (int): total attempts per call, including the first
+            :max_elapsed (int): seconds after which no further attempt is made
+            :base (float): backoff seconds preceding the first retry
+            :cap (float): maximum backoff seconds between any two attempts
+            :breaker_threshold (int): consecutive failed calls which open an
+                account's circuit
+            :breaker_reset (int): seconds an open circuit waits before a trial call
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.max_elapsed = max_elapsed
+        self.base = base
+        self.cap = cap
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, key):
+        """ circuit breaker for key (typically an account id), created on demand """
+        with self._lock:
+            if key not in self.breakers:
+                self.breakers[key] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self.breakers[key]
+
+    def backoff(self, attempt):
+        """ full jitter delay in seconds preceding retry number attempt """
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+    def call(self, func, key=None, attempts=None, **kwargs):
+        """
+        Summary:
+            invoke func with retries
+
+        Args:
+            :func (callable): boto3 client method
+            :key (str): circuit breaker key; None disables the breaker
+            :attempts (int): overrides max_attempts for this call.  The caller
+                retries elsewhere, e.g. with another source identity, so a
+                retryable or expired token error ending the call is not
+                counted against key's circuit breaker
+            :kwargs: parameters passed to func
+
+        Returns:
+            response of func
+
+        Raises:
+            ClientError | final error, or CIRCUIT_OPEN when key's circuit is open.
+            botocore connection and timeout errors are re-raised as they are
+        """
+        breaker = self.breaker(key) if key is not None else None
+        if breaker is not None and not breaker.allow():
+            raise ClientError(
+                {'Error': {
+                    'Code': CIRCUIT_OPEN,
+                    'Message': 'circuit open for %s after %d consecutive failures' %
+                               (key, breaker.failures)}},
+                getattr(func, '__name__', 'unknown')
+            )
+
+        limit = self.max_attempts if attempts is None else max(1, int(attempts))
+        start = time.monotonic()
+        attempt = 0
+        settled = breaker is None
+        try:
+            while True:
+                attempt += 1
+                try:
+                    response = func(**kwargs)
+                except (ClientError,) + RETRYABLE_ERRORS as e:
+                    code = error_code(e)
+                    retryable = is_retryable(e)
+                    delay = self.backoff(attempt)
+                    if (not retryable or attempt >= limit or
+                            time.monotonic() - start + delay > self.max_elapsed):
+                        if breaker is not None:
+                            if attempts is not None and (retryable or code in EXPIRED_CODES):
+                                breaker.release()       # caller fails over
+                            else:
+                                breaker.record_failure()
+                            settled = True
+                        raise
+                    logger.info(
+                        'retrying %s after %s (attempt %d of %d, backoff %.2fs)' %
+                        (getattr(func, '__name__', 'call'), code, attempt,
+                         limit, delay))
+                    time.sleep(delay)
+                    continue
+                if breaker is not None:
+                    breaker.record_success()
+                    settled = True
+                return response
+        finally:
+            if not settled:
+                breaker.record_failure()    # unexpected exception; ends any trial
@@ -20,6 +20,37 @@ Module Attributes:
         Default valid lifetime for Amazon STS generated session tokens (minutes)
     - credential_life_default (TYPE int):
         Default valid lifetime for Amazon STS generated temp credentails (minutes)
+    - role_duration_max (TYPE int):
+        Longest assume_role DurationSeconds any role accepts (minutes); the
+        per-role limit is the role's MaxSessionDuration
+    - max_workers (TYPE int):
+        Default number of concurrent assume_role calls issued when generating
+        credentials for multiple roles; also sizes the botocore connection pool
+    - retry_max_attempts (TYPE int):
+        Attempts made for a throttled or transiently failing sts or iam api call
+    - retry_max_elapsed (TYPE int):
+        Seconds after which a throttled api call is no longer retried
+    - breaker_threshold (TYPE int):
+        Consecutive failed calls to an account which open its circuit breaker
+    - breaker_reset (TYPE int):
+        Seconds an open circuit breaker waits before permitting a trial call
+    - users_ttl (TYPE int):
+        Seconds a cached iam user directory is used before list_users is called
+    - refresh_skew (TYPE int):
+        Seconds before expiration at which cached credentials are considered
+        expired and are regenerated
+    - refresh_window (TYPE int):
+        Seconds, ahead of refresh_skew, across which scheduled role refreshes
+        are spread by a deterministic per-node, per-role jitter
+    - discovery_ttl (TYPE int):
+        Seconds a cached organizations account list is used before
+        ListAccounts is called again
+    - flight_timeout (TYPE int):
+        Seconds a process waits for another process's in-flight assume_role
+        result before calling STS itself
+    - identity_cooldown (TYPE int):
+        Seconds a throttled source identity in a multi-identity pool is
+        passed over before it is issued further assume_role calls
     - awscli_creds (TYPE str):
         Path including filename to the default awscli credentials file
     - awscli_creds_alternate (TYPE str):
@@ -89,6 +120,18 @@ else:
     sts_min = 15                                          # minutes
     token_life_default = 60                               # minutes
     credential_life_default = 60                          # 1 hr (STS Default)
+    role_duration_max = 720                               # minutes, 12 hr
+    max_workers = 10                                      # concurrent sts calls
+    retry_max_attempts = 5
+    retry_max_elapsed = 60                                # seconds
+    breaker_threshold = 5
+    breaker_reset = 300                                   # seconds
+    users_ttl = 3600                                      # seconds
+    refresh_skew = 300                                    # seconds
+    refresh_window = 300                                  # seconds
+    flight_timeout = 10                                   # seconds
+    discovery_ttl = 86400                                 # seconds, 1 day
+    identity_cooldown = 30                                # seconds
     profile_user = 'default'
     sts_profiles_file = 'profiles.json'
     awscli_creds = user_home + '/' + '.aws/credentials'
@@ -134,6 +177,18 @@ defaults = {
     'sts_min': datetime.timedelta(minutes=int(sts_min)),
     'token_life': datetime.timedelta(minutes=int(token_life_default)),
     'credential_life': datetime.timedelta(minutes=int(credential_life_default)),
+    'role_duration_max': datetime.timedelta(minutes=int(role_duration_max)),
+    'max_workers': max_workers,
+    'retry_max_attempts': retry_max_attempts,
+    'retry_max_elapsed': retry_max_elapsed,
+    'breaker_threshold': breaker_threshold,
+    'breaker_reset': breaker_reset,
+    'users_ttl': users_ttl,
+    'refresh_skew': datetime.timedelta(seconds=int(refresh_skew)),
+    'refresh_window': datetime.timedelta(seconds=int(refresh_window)),
+    'flight_timeout': flight_timeout,
+    'discovery_ttl': discovery_ttl,
+    'identity_cooldown': identity_cooldown,
     'profile_user': local_config.get('profile_user') or profile_user,
     'output_file': sts_profiles_file,
     'awscli_creds': awscli_creds,
@@ -0,0 +1,69 @@
+"""
+Summary:
+    On-disk, TTL-bound cache of the iam user names visible to a profile.
+    While the cache is fresh the iam list_users api is not called at all;
+    membership checks against the loaded directory are O(1).
+
+Module Attributes:
+    None
+
+"""
+
+import os
+import json
+import time
+from stslib.persist import write_atomic, read_json
+
+
+class UserDirectory():
+    """
+    iam user names cached in a json file under the stslib config directory
+    """
+    def __init__(self, path, ttl):
+        """
+        Args:
+            :path (str): cache file location
+            :ttl (int): seconds for which a cached directory is considered fresh
+        """
+        self.path = path
+        self.ttl = ttl
+
+    def fresh(self):
+        """ True if the cache file exists and is younger than ttl """
+        try:
+            return time.time() - os.path.getmtime(self.path) < self.ttl
+        except OSError:
+            return False
+
+    def load(self):
+        """
+        Returns:
+            cached user names | TYPE: frozenset, or None if stale or missing
+        """
+        if not self.fresh():
+            return None
+        content = read_json(self.path)
+        if content is None:
+            return None
+        return frozenset(content.get('users', []))
+
+    def save(self, users):
+        """
+        Summary:
+            consumes an iterable of user names (e.g. a streaming, paginated
+            list_users generator) and writes the directory to disk
+
+        Returns:
+            user names | TYPE: frozenset
+        """
+        directory = frozenset(users)
+        write_atomic(
+            self.path,
+            json.dumps({'updated': time.time(), 'users': sorted(directory)}, indent=4)
+        )
+        return directory
+
+    def invalidate(self):
+        """ removes the cache file, forcing the next load to miss """
+        if os.path.exists(self.path):
+            os.remove(self.path)
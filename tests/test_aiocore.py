@@ -0,0 +1,83 @@
+"""
+Summary:
+    Tests for stslib aiocore.py module, run against moto mock sts and iam
+    services (see conftest.py)
+
+Test Framework: pytest
+
+"""
+import sys
+import time
+import asyncio
+import threading
+from botocore.exceptions import ClientError
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.aiocore import AsyncStsCore
+from stslib.vault import STSToken
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class TestAsyncStsCore():
+    """
+    validate concurrent credential generation and the refresh task
+    """
+    def test_01_concurrency_bounded(self, core_factory):
+        core = core_factory(cls=AsyncStsCore, max_workers=2)
+        request = core._request
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def slow(source, alias, prefix, start):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            return request(source, alias, prefix, start)
+        core._request = slow
+        credentials = run(core.agenerate_credentials(['role0', 'role1', 'role2', 'role3']))
+        assert sorted(credentials) == ['sts-role0', 'sts-role1', 'sts-role2', 'sts-role3']
+        assert peak[0] == 2
+        assert core.results.complete and len(core.results) == 4
+        core._halt_task()
+
+    def test_02_partial_failure_recorded(self, core_factory):
+        core = core_factory(cls=AsyncStsCore)
+        request = core._request
+
+        def denied(source, alias, prefix, start):
+            if alias == 'role1':
+                raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'no'}}, 'AssumeRole')
+            return request(source, alias, prefix, start)
+        core._request = denied
+        assert run(core.agenerate_credentials(['role0', 'role1'])) == {}
+        assert list(core.results.successes) == ['role0']
+        assert core.results.failures['role1'].code == 'AccessDenied'
+
+    def test_03_refresh_task_renews(self, core_factory):
+        core = core_factory(cls=AsyncStsCore, refresh_skew=3599, refresh_window=0, format='boto')
+
+        async def main():
+            await core.agenerate_credentials(['role0'])
+            first = core.credentials['sts-role0']
+            assert [x['alias'] for x in core.refresh_timeline()] == ['role0']
+            await asyncio.sleep(2.5)
+            renewed = core.credentials['sts-role0']
+            assert renewed['AccessKeyId'] != first['AccessKeyId']
+            assert renewed['Expiration'] > first['Expiration']
+            assert not core.task.done()
+            assert core._halt_task()
+        run(main())
+
+    def test_04_refresh_task_ends_at_token_expiry(self, core_factory):
+        core = core_factory(cls=AsyncStsCore, refresh_skew=3599, refresh_window=0)
+        run(core.agenerate_credentials(['role0']))
+        core._halt_task()
+        core.token = STSToken(dict(core.token.boto, Expiration=core.token.start))
+        assert run(asyncio.wait_for(core._refresh(), 5)) is True
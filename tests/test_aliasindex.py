@@ -0,0 +1,86 @@
+"""
+Summary:
+    Tests for stslib aliasindex.py module
+
+Test Framework: pytest
+
+"""
+import re
+import sys
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.aliasindex import AliasIndex
+from stslib.profilestore import ProfileStore
+
+
+def role(account, name):
+    return {
+        'role_arn': 'arn:aws:iam::%s:role/%s' % (account, name),
+        'mfa_serial': 'arn:aws:iam::111111111111:mfa/user',
+        'source_profile': 'default'
+    }
+
+
+class CountingStore(ProfileStore):
+    """ ProfileStore recording each full read of its profiles """
+    scans = 0
+
+    def items(self):
+        self.scans += 1
+        return super().items()
+
+
+PROFILES = {
+    'default': {'aws_access_key_id': 'AKIA', 'aws_secret_access_key': 's'},
+    'acme-dev': role('222222222222', 'OrgAdmin'),
+    'acme-prod': role('333333333333', 'OrgAdmin'),
+    'acme-prod-ro': role('333333333333', 'ReadOnly'),
+    'beta-prod': role('444444444444', 'ReadOnly')
+}
+
+
+class TestAliasIndex():
+    """
+    validate selector resolution against a frozen alias index
+    """
+    def test_01_exact(self):
+        index = AliasIndex(PROFILES)
+        assert 'acme-dev' in index and len(index) == 5
+        assert index.select(['acme-dev', 'missing']) == ['acme-dev', 'missing']
+        assert index.select('acme-dev') == ['acme-dev']
+
+    def test_02_selectors(self):
+        index = AliasIndex(PROFILES)
+        assert index.select(['*-prod']) == ['acme-prod', 'beta-prod']
+        assert index.select(['account:333333333333']) == ['acme-prod', 'acme-prod-ro']
+        assert index.select(['account:3*']) == ['acme-prod', 'acme-prod-ro']
+        assert index.select(['role:ReadOnly']) == ['acme-prod-ro', 'beta-prod']
+        assert index.select(['re:^acme-(dev|prod)$']) == ['acme-dev', 'acme-prod']
+        assert index.select([re.compile('ro$')]) == ['acme-prod-ro']
+
+    def test_03_order_and_unmatched(self):
+        index = AliasIndex(PROFILES)
+        # de-duplicated in order of first selection; unmatched passed through
+        assert index.select(['beta-prod', '*-prod', 'account:999999999999']) == \
+            ['beta-prod', 'acme-prod', 'account:999999999999']
+
+    def test_04_selectors_match_roles_only(self):
+        index = AliasIndex(PROFILES)
+        assert 'default' not in index.select(['*'])
+        assert index.select(['*']) == ['acme-dev', 'acme-prod', 'acme-prod-ro', 'beta-prod']
+        assert index.match('re:^def') == []
+        assert index.select(['default']) == ['default']     # exact alias unaffected
+
+    def test_05_profile_store_read_lazily(self, tmpdir):
+        store = CountingStore(str(tmpdir.join('profiles.db')))
+        store.update(PROFILES)
+        index = AliasIndex(store)
+        assert 'acme-dev' in index and 'missing' not in index and len(index) == 5
+        assert index.select(['acme-dev', 'account:333333333333', 'default']) == \
+            ['acme-dev', 'acme-prod', 'acme-prod-ro', 'default']
+        assert store.scans == 0
+        # globs and regexes scan the store once
+        assert index.select(['*-prod', 're:^acme-dev$']) == ['acme-prod', 'beta-prod', 'acme-dev']
+        assert index.select(['role:ReadOnly']) == AliasIndex(PROFILES).select(['role:ReadOnly'])
+        assert store.scans == 1
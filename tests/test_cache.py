@@ -0,0 +1,77 @@
+"""
+Summary:
+    Tests for stslib cache.py module
+
+Test Framework: pytest
+
+"""
+import os
+import sys
+import stat
+import datetime
+import pytz
+import pytest
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.cache import CredentialCache, TokenStore
+from stslib.persist import FileLock
+
+
+def boto_set(minutes):
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    return {
+        'StartTime': now,
+        'Expiration': now + datetime.timedelta(minutes=minutes),
+        'AccessKeyId': 'ASIAEXAMPLE%d' % minutes,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token'
+    }
+
+
+class TestCredentialCache():
+    """
+    validate persistence, expiry eviction and file permissions
+    """
+    def test_01_round_trip(self, tmpdir):
+        path = str(tmpdir.join('credentials.json'))
+        token = boto_set(120)
+        CredentialCache(path).save_token(token)
+        CredentialCache(path).save_credentials({'sts-a': boto_set(60)})
+        # new instance, as after a process restart
+        cache = CredentialCache(path)
+        assert cache.token()['AccessKeyId'] == token['AccessKeyId']
+        assert cache.token()['Expiration'].timestamp() == pytest.approx(
+            token['Expiration'].timestamp())
+        assert list(cache.credentials()) == ['sts-a']
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    def test_02_skew_eviction(self, tmpdir):
+        path = str(tmpdir.join('credentials.json'))
+        cache = CredentialCache(path, skew=datetime.timedelta(minutes=10))
+        cache.save_credentials({'sts-a': boto_set(60), 'sts-b': boto_set(5)})
+        assert list(cache.credentials()) == ['sts-a']
+        assert cache.credentials(['sts-b', 'sts-c']) == {}
+        assert cache.token() is None
+
+
+class TestTokenStore():
+    """
+    validate token publication, adoption and locking
+    """
+    def test_01_publish_adopt(self, tmpdir):
+        path = str(tmpdir.join('token.json'))
+        assert TokenStore(path).adopt() is None
+        TokenStore(path).publish(boto_set(60))
+        assert TokenStore(path).adopt()['AccessKeyId'] == 'ASIAEXAMPLE60'
+        # tokens expiring within skew are not adopted
+        skewed = TokenStore(path, skew=datetime.timedelta(minutes=90))
+        assert skewed.adopt() is None
+
+    def test_02_lock_excludes(self, tmpdir):
+        path = str(tmpdir.join('token.json.lock'))
+        holder = FileLock(path)
+        assert holder.acquire()
+        assert not FileLock(path, timeout=0.1).acquire()
+        holder.release()
+        assert FileLock(path, timeout=0.1).acquire()
@@ -0,0 +1,78 @@
+"""
+Summary:
+    Tests for stslib clients.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import datetime
+import boto3
+import pytz
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.clients import ClientCache
+from stslib.vault import STSToken
+
+
+def token(access_key, seconds=3600):
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    return STSToken({
+        'AccessKeyId': access_key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'session',
+        'StartTime': now - datetime.timedelta(hours=1),
+        'Expiration': now + datetime.timedelta(seconds=seconds)
+    })
+
+
+def session():
+    return boto3.Session(
+        aws_access_key_id='AKIAEXAMPLE',
+        aws_secret_access_key='secret',
+        region_name='us-east-1'
+    )
+
+
+class TestClientCache():
+    """
+    validate client reuse and invalidation
+    """
+    def test_01_reused_per_service_region_identity(self):
+        cache = ClientCache(session())
+        a, b = token('ASIAA'), token('ASIAB')
+        assert cache.get('sts') is cache.get('sts')
+        assert cache.get('sts', token=a) is cache.get('sts', token=a)
+        assert cache.get('sts', token=a) is not cache.get('sts', token=b)
+        assert cache.get('sts', token=a) is not cache.get('sts')
+        assert cache.get('sts', region='eu-west-1') is not cache.get('sts')
+        assert cache.get('iam') is not cache.get('sts')
+        assert len(cache) == 5
+
+    def test_02_invalidate(self):
+        cache = ClientCache(session())
+        a, b = token('ASIAA'), token('ASIAB')
+        first = cache.get('sts', token=a)
+        cache.get('iam', token=a)
+        cache.get('sts', token=b)
+        assert cache.invalidate('ASIAA') == 2
+        assert len(cache) == 1
+        assert cache.get('sts', token=a) is not first
+        assert cache.invalidate() == 2 and len(cache) == 0
+
+    def test_03_expired_token_clients_pruned(self):
+        cache = ClientCache(session())
+        cache.get('sts', token=token('ASIAOLD', seconds=-60))
+        cache.get('sts')
+        assert len(cache) == 1
+        assert all(key[2] != 'ASIAOLD' for key in cache._clients)
+
+    def test_04_rotated_session_token_invalidated(self, core_factory):
+        core = core_factory()
+        old = core.token.access_key
+        core._token_client(core.token)
+        assert any(key[2] == old for key in core.clients._clients)
+        # moto issues the same access key each time; rotate it by hand
+        core.token = core._set_session_token(dict(core.token.boto, AccessKeyId='ASIAROTATED'))
+        assert all(key[2] != old for key in core.clients._clients)
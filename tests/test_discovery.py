@@ -0,0 +1,100 @@
+"""
+Summary:
+    Tests for stslib discovery.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import pytest
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.discovery import AccountDiscovery
+
+
+TEMPLATE = 'arn:aws:iam::{account}:role/OrgAdmin'
+
+
+def account(id, name, status='ACTIVE'):
+    return {'Id': id, 'Name': name, 'Status': status}
+
+
+class TestAccountDiscovery():
+    """
+    validate account caching and profile synthesis
+    """
+    def test_01_synthesize(self, tmpdir):
+        discovery = AccountDiscovery(str(tmpdir.join('accounts.json')), TEMPLATE)
+        assert not discovery.fresh()
+        added, removed = discovery.update([
+            account('222222222222', 'acme dev'),
+            account('333333333333', 'acme dev'),
+            account('444444444444', 'closed', status='SUSPENDED')
+        ])
+        assert sorted(added) == ['222222222222', '333333333333'] and removed == {}
+        assert discovery.fresh()
+        profiles = discovery.profiles(discovery.accounts(), 'default', 'mfa')
+        assert profiles == {
+            'acme-dev': {
+                'role_arn': 'arn:aws:iam::222222222222:role/OrgAdmin',
+                'mfa_serial': 'mfa', 'source_profile': 'default'},
+            'acme-dev-333333333333': {
+                'role_arn': 'arn:aws:iam::333333333333:role/OrgAdmin',
+                'mfa_serial': 'mfa', 'source_profile': 'default'}
+        }
+
+    def test_02_incremental(self, tmpdir):
+        discovery = AccountDiscovery(str(tmpdir.join('accounts.json')), TEMPLATE,
+                                     alias_template='{role}-{account}')
+        discovery.update([account('222222222222', 'a'), account('333333333333', 'b')])
+        added, removed = discovery.update([account('333333333333', 'b'), account('555555555555', 'c')])
+        assert list(added) == ['555555555555']
+        assert removed == {'222222222222': {'name': 'a', 'alias': 'OrgAdmin-222222222222'}}
+        assert sorted(discovery.accounts()) == ['333333333333', '555555555555']
+        # changed template invalidates the cache
+        other = AccountDiscovery(discovery.path, 'arn:aws:iam::{account}:role/ReadOnly')
+        assert other.accounts() == {} and not other.fresh()
+
+    def test_03_ttl(self, tmpdir):
+        discovery = AccountDiscovery(str(tmpdir.join('accounts.json')), TEMPLATE, ttl=0)
+        discovery.update([account('222222222222', 'a')])
+        assert not discovery.fresh()
+        assert list(discovery.accounts()) == ['222222222222']
+
+    def test_04_organizations(self, core_factory):
+        moto = pytest.importorskip('moto')
+        import boto3
+        with moto.mock_organizations():
+            client = boto3.client('organizations', region_name='us-east-1')
+            client.create_organization(FeatureSet='ALL')
+            for i in range(25):
+                client.create_account(AccountName='acct%02d' % i, Email='a%d@example.com' % i)
+
+            core = core_factory(token=False, role_template=TEMPLATE)
+            call, operations = core._call, []
+
+            def paged(client, operation, **kwargs):
+                # moto returns every account at once; serve MaxResults pages
+                operations.append(operation)
+                size = kwargs.pop('MaxResults')
+                offset = int(kwargs.pop('NextToken', 0))
+                response = call(client, operation, **kwargs)
+                accounts = response['Accounts']
+                response['Accounts'] = accounts[offset:offset + size]
+                if offset + size < len(accounts):
+                    response['NextToken'] = str(offset + size)
+                return response
+            core._call = paged
+            written = core.discover_accounts(force=True, page_size=10)
+            assert operations == ['list_accounts'] * 3
+            assert len(written['added']) == 26      # created accounts and the master account
+            assert core.profiles['acct07']['role_arn'].endswith(':role/OrgAdmin')
+            assert core.profiles['acct07']['source_profile'] == 'default'
+            assert core.select(['acct1*']) == ['acct%02d' % i for i in range(10, 20)]
+
+            # cached list is fresh; no further ListAccounts call
+            client.create_account(AccountName='late', Email='late@example.com')
+            assert core.discover_accounts() == {'added': [], 'removed': []}
+            assert core.discover_accounts(force=True, page_size=10)['added'] == ['late']
+            assert operations.count('list_accounts') == 6
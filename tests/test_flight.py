@@ -0,0 +1,85 @@
+"""
+Summary:
+    Tests for stslib flight.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import time
+import datetime
+import threading
+import pytz
+import pytest
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.flight import ThreadFlight, ProcessFlight
+from stslib.cache import CredentialCache
+
+
+class TestThreadFlight():
+    """
+    validate in-process request coalescing
+    """
+    def test_01_concurrent_requests_coalesced(self):
+        flight = ThreadFlight()
+        calls, results = [], []
+
+        def slow_call():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'AccessKeyId': 'ASIAEXAMPLE'}
+
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.run('sts-a', slow_call)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert len(results) == 5
+        assert flight.stats() == {'issued': 1, 'coalesced': 4, 'in_flight': 0}
+
+    def test_02_exception_shared_then_cleared(self):
+        flight = ThreadFlight()
+
+        def failing_call():
+            raise ValueError('assume_role failed')
+
+        with pytest.raises(ValueError):
+            flight.run('sts-a', failing_call)
+        assert flight.run('sts-a', lambda: 'retried') == 'retried'
+
+
+def boto_set(minutes, access_key):
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    return {
+        'StartTime': now,
+        'Expiration': now + datetime.timedelta(minutes=minutes),
+        'AccessKeyId': access_key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token'
+    }
+
+
+class TestProcessFlight():
+    """
+    validate reuse of results produced by other processes
+    """
+    def test_01_renewal_not_served_replaced_credentials(self, tmpdir):
+        cache = CredentialCache(str(tmpdir.join('credentials.json')))
+        flight = ProcessFlight(str(tmpdir), cache, timeout=1)
+        held = boto_set(30, 'ASIAHELD')
+        cache.save_credentials({'sts-a': held})
+
+        # no credentials held: another process's result is adopted
+        assert flight.run('sts-a', lambda: boto_set(60, 'ASIANEW'))['AccessKeyId'] == 'ASIAHELD'
+        # renewing: the entry being replaced is not returned
+        renewed = flight.run('sts-a', lambda: boto_set(60, 'ASIANEW'), held['Expiration'])
+        assert renewed['AccessKeyId'] == 'ASIANEW'
+        # a later result written by another process is adopted
+        adopted = flight.run('sts-a', lambda: boto_set(90, 'ASIALATE'), held['Expiration'])
+        assert adopted['AccessKeyId'] == 'ASIANEW'
@@ -0,0 +1,134 @@
+"""
+Summary:
+    Tests for stslib pool.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import datetime
+import threading
+import pytz
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.pool import IdentityPool, NO_IDENTITY
+from stslib.vault import STSToken
+
+
+def token(access_key, hours=1):
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    return STSToken({
+        'AccessKeyId': access_key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'session',
+        'StartTime': now,
+        'Expiration': now + datetime.timedelta(hours=hours)
+    })
+
+
+class Identity():
+    """ source identity whose client is its own profile name """
+    def __init__(self, profile_user, hours=1):
+        self.profile_user = profile_user
+        self.token = token('ASIA' + profile_user.upper(), hours)
+
+    def _token_client(self, token):
+        return self.profile_user
+
+
+def error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'AssumeRole')
+
+
+class TestIdentityPool():
+    """
+    validate load balancing, failover and per-identity counts
+    """
+    def test_01_calls_balanced(self):
+        pool = IdentityPool([Identity('a'), Identity('b'), Identity('c')])
+        used = [pool.call(lambda client, attempts: client) for _ in range(9)]
+        assert sorted(used) == ['a'] * 3 + ['b'] * 3 + ['c'] * 3
+        assert {k: v['calls'] for k, v in pool.stats().items()} == {'a': 3, 'b': 3, 'c': 3}
+
+    def test_02_least_in_flight_preferred(self):
+        pool = IdentityPool([Identity('a'), Identity('b')])
+        release = threading.Event()
+        busy = threading.Thread(
+            target=pool.call, args=(lambda client, attempts: release.wait(5),))
+        busy.start()
+        try:
+            while pool.stats()['a']['in_flight'] == 0:
+                pass
+            assert pool.call(lambda client, attempts: client) == 'b'
+        finally:
+            release.set()
+            busy.join()
+
+    def test_03_throttled_identity_fails_over(self):
+        pool = IdentityPool([Identity('a'), Identity('b')], cooldown=60)
+        seen = []
+
+        def assume(client, attempts):
+            seen.append((client, attempts))
+            if client == 'a':
+                raise error('Throttling')
+            return client
+        assert pool.call(assume) == 'b'
+        assert seen == [('a', 1), ('b', None)]
+        # a is cooling down; b takes further calls
+        assert pool.call(assume) == 'b'
+        stats = pool.stats()
+        assert stats['a']['throttled'] == 1 and stats['a']['failovers'] == 1
+        assert stats['b']['calls'] == 2
+
+    def test_03_unreachable_identity_fails_over(self):
+        pool = IdentityPool([Identity('a'), Identity('b')], cooldown=60)
+        seen = []
+
+        def assume(client, attempts):
+            seen.append((client, attempts))
+            if client == 'a':
+                raise EndpointConnectionError(endpoint_url='https://sts.amazonaws.com')
+            return client
+        assert pool.call(assume) == 'b'
+        assert seen == [('a', 1), ('b', None)]
+        assert pool.call(assume) == 'b'
+        stats = pool.stats()
+        assert stats['a']['unreachable'] == 1 and stats['a']['failovers'] == 1
+        assert stats['a']['throttled'] == 0
+        # the last identity available is not failed over, its error is raised
+        with pytest.raises(EndpointConnectionError):
+            IdentityPool([Identity('a')]).call(assume)
+
+    def test_04_expired_token_set_aside_until_renewed(self):
+        a, b = Identity('a'), Identity('b')
+        pool = IdentityPool([a, b])
+
+        def assume(client, attempts):
+            if client == 'a' and a.token.access_key == 'ASIAA':
+                raise error('ExpiredToken')
+            return client
+        assert pool.call(assume) == 'b'
+        assert pool.live() == ['b']
+        a.token = token('ASIAA2')
+        assert pool.live() == ['a', 'b']
+
+    def test_05_role_errors_not_failed_over(self):
+        pool = IdentityPool([Identity('a'), Identity('b')])
+        calls = []
+
+        def assume(client, attempts):
+            calls.append(client)
+            raise error('AccessDenied')
+        with pytest.raises(ClientError):
+            pool.call(assume)
+        assert len(calls) == 1
+
+    def test_06_no_valid_token(self):
+        pool = IdentityPool([Identity('a', hours=-1)])
+        with pytest.raises(ClientError) as e:
+            pool.call(lambda client, attempts: client)
+        assert e.value.response['Error']['Code'] == NO_IDENTITY
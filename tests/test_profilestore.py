@@ -0,0 +1,80 @@
+"""
+Summary:
+    Tests for stslib profilestore.py module
+
+Test Framework: pytest
+
+"""
+import os
+import sys
+import pytest
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib import refactor
+from stslib.profilestore import ProfileStore
+
+
+def role(account, name, source='default'):
+    return {
+        'role_arn': 'arn:aws:iam::%s:role/%s' % (account, name),
+        'mfa_serial': 'arn:aws:iam::111111111111:mfa/user',
+        'source_profile': source
+    }
+
+
+class TestProfileStore():
+    """
+    validate indexed, lazily loaded profile lookups
+    """
+    def test_01_mapping(self, tmpdir):
+        store = ProfileStore(str(tmpdir.join('profiles.db')))
+        store.update({'a': role('222222222222', 'A'), 'b': role('333333333333', 'B')})
+        assert len(store) == 2 and 'a' in store and 'z' not in store
+        assert list(store.keys()) == ['a', 'b']
+        assert store['b']['role_arn'].endswith('role/B')
+        assert store.get('z') is None
+        with pytest.raises(KeyError):
+            store['z']
+
+    def test_02_indexes(self, tmpdir):
+        store = ProfileStore(str(tmpdir.join('profiles.db')))
+        store.update({
+            'a': role('222222222222', 'A'),
+            'b': role('222222222222', 'B', source='other'),
+            'user': {'aws_access_key_id': 'AKIA', 'aws_secret_access_key': 's'}
+        })
+        assert store.by_account('222222222222') == ['a', 'b']
+        assert store.by_source('other') == ['b']
+        assert store.by_mfa('arn:aws:iam::111111111111:mfa/user') == ['a', 'b']
+        store.update({}, removed=['a'])
+        assert store.by_account(222222222222) == ['b']
+
+    def test_03_sync(self, tmpdir):
+        source = str(tmpdir.join('credentials'))
+        store = ProfileStore(str(tmpdir.join('profiles.db')))
+        with open(source, 'w') as f:
+            f.write('[r1]\nrole_arn = arn:aws:iam::222222222222:role/A\n'
+                    'mfa_serial = m\nsource_profile = default\n')
+        assert refactor.sync_awscli(source, 'unused.json', store=store)['added'] == ['r1']
+        assert store.signature()['input'] == os.path.abspath(source)
+        with open(source, 'a') as f:
+            f.write('[r2]\nrole_arn = arn:aws:iam::333333333333:role/B\n'
+                    'mfa_serial = m\nsource_profile = default\n')
+        os.utime(source, (1, 1))
+        changes = refactor.sync_awscli(source, 'unused.json', store=store)
+        assert changes == {'added': ['r2'], 'removed': [], 'modified': []}
+        assert store.by_account('333333333333') == ['r2']
+        assert not os.path.exists(refactor.config_dir + '/unused.json')
+
+    def test_04_input_changed(self, tmpdir):
+        store = ProfileStore(str(tmpdir.join('profiles.db')))
+        role = '[%s]\nrole_arn = arn:aws:iam::222222222222:role/A\nmfa_serial = m\nsource_profile = default\n'
+        for name in ('old', 'new'):
+            with open(str(tmpdir.join(name)), 'w') as f:
+                f.write(role % name)
+        store.update({'discovered': {'role_arn': 'arn:aws:iam::444444444444:role/A'}})
+        refactor.sync_awscli(str(tmpdir.join('old')), 'unused.json', store=store)
+        changes = refactor.sync_awscli(str(tmpdir.join('new')), 'unused.json', store=store)
+        assert changes['removed'] == ['old']
+        assert list(store) == ['discovered', 'new']
@@ -0,0 +1,47 @@
+"""
+Summary:
+    Tests for stslib ratelimit.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import time
+import threading
+import pytest
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.ratelimit import RateLimiter
+
+
+class TestRateLimiter():
+    """
+    validate token bucket permits, waits and counters
+    """
+    def test_01_burst_not_delayed(self):
+        limiter = RateLimiter(rate=1, burst=5)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        assert time.monotonic() - start < 0.5
+        assert limiter.stats()['granted'] == 5
+        assert limiter.stats()['wait_seconds'] == 0
+
+    def test_02_rate_enforced_across_threads(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(21)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.monotonic() - start >= 0.18
+        stats = limiter.stats()
+        assert stats['granted'] == 21
+        assert stats['queue_depth'] == 0
+        assert stats['max_queue_depth'] >= 1
+
+    def test_03_invalid_rate(self):
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
@@ -0,0 +1,153 @@
+"""
+Summary:
+    Tests for incremental parsing in stslib refactor.py module
+
+Test Framework: pytest
+
+"""
+import os
+import sys
+import json
+import pytest
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib import refactor
+
+
+USER = """[default]
+aws_access_key_id = AKIAEXAMPLE
+aws_secret_access_key = secret
+"""
+
+ROLE = """[%s]
+role_arn = arn:aws:iam::123456789012:role/%s
+mfa_serial = arn:aws:iam::123456789012:mfa/user
+source_profile = default
+"""
+
+
+def write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+@pytest.fixture()
+def config_dir(tmpdir, monkeypatch):
+    """ output and sidecar files written to tmpdir, not ~/.stslib """
+    path = str(tmpdir.mkdir('stslib'))
+    monkeypatch.setattr(refactor, 'config_dir', path)
+    return path
+
+
+class TestSyncAwscli():
+    """
+    validate change-aware refactor of awscli credentials
+    """
+    def paths(self, tmpdir, config_dir):
+        return str(tmpdir.join('credentials')), config_dir + '/sync.json'
+
+    def test_01_first_parse(self, tmpdir, config_dir):
+        source, output = self.paths(tmpdir, config_dir)
+        write(source, USER + ROLE % ('role0', 'Admin') + ROLE % ('role1', 'ReadOnly'))
+        changes = refactor.sync_awscli(source, output)
+        assert changes['added'] == ['default', 'role0', 'role1']
+        with open(output) as f:
+            assert json.load(f)['role1']['role_arn'].endswith('role/ReadOnly')
+        # unchanged input; output not rewritten
+        mtime = os.path.getmtime(output)
+        assert refactor.sync_awscli(source, output) == {'added': [], 'removed': [], 'modified': []}
+        assert os.path.getmtime(output) == mtime
+
+    def test_02_incremental(self, tmpdir, config_dir):
+        source, output = self.paths(tmpdir, config_dir)
+        write(source, USER + ROLE % ('role0', 'Admin') + ROLE % ('role1', 'ReadOnly'))
+        refactor.sync_awscli(source, output)
+        write(source, USER + ROLE % ('role1', 'PowerUser') + ROLE % ('role2', 'Admin'))
+        os.utime(source, (1, 1))        # guarantee a new signature
+        changes = refactor.sync_awscli(source, output)
+        assert changes == {'added': ['role2'], 'removed': ['role0'], 'modified': ['role1']}
+        with open(output) as f:
+            profiles = json.load(f)
+        assert sorted(profiles) == ['default', 'role1', 'role2']
+        assert profiles['role1']['role_arn'].endswith('role/PowerUser')
+
+    def test_03_touched_not_modified(self, tmpdir, config_dir):
+        source, output = self.paths(tmpdir, config_dir)
+        write(source, USER + ROLE % ('role0', 'Admin'))
+        refactor.sync_awscli(source, output)
+        os.utime(source, (1, 1))
+        assert refactor.sync_awscli(source, output) == {'added': [], 'removed': [], 'modified': []}
+
+    def test_04_missing_input(self, tmpdir, config_dir):
+        source, output = self.paths(tmpdir, config_dir)
+        assert refactor.sync_awscli(source, output) is False
+
+    def test_05_input_changed(self, tmpdir, config_dir):
+        source, output = self.paths(tmpdir, config_dir)
+        other = str(tmpdir.join('other'))
+        write(source, USER + ROLE % ('old', 'Admin') + ROLE % ('kept', 'Admin'))
+        write(other, ROLE % ('new', 'Admin') + ROLE % ('kept', 'Admin'))
+        refactor.sync_awscli(source, output)
+        changes = refactor.sync_awscli(other, output)
+        assert changes == {'added': ['kept', 'new'], 'removed': ['default', 'old'], 'modified': []}
+        with open(output) as f:
+            assert sorted(json.load(f)) == ['kept', 'new']
+
+
+class TestStreamingParser():
+    """
+    validate single pass parsing and offset indexed lookups
+    """
+    def test_01_matches_configparser(self, tmpdir):
+        import configparser
+        source = str(tmpdir.join('credentials'))
+        write(source, '# generated\n' + USER + ROLE % ('role0', 'Admin') +
+              '[sts-role0]\naws_access_key_id = ASIA\naws_secret_access_key = x\n' +
+              '[Role1]\nRole_Arn: arn:aws:iam::123456789012:role/R\n' +
+              'mfa_serial = m\n; comment\nsource_profile = default\n  continued\n' +
+              '[inherits]\nrole_arn = arn:aws:iam::123456789012:role/I\nsource_profile = default\n' +
+              '[DEFAULT]\nmfa_serial = arn:aws:iam::123456789012:mfa/default\n')
+        config = configparser.ConfigParser()
+        config.read(source)
+        expected = {
+            name: refactor.classify(dict(config[name]))
+            for name in config.sections() if refactor._included(name)
+        }
+        streamed = {name: profile for name, profile, _, _ in refactor.iter_profiles(source)}
+        assert streamed == expected
+        assert sorted(streamed) == ['Role1', 'default', 'inherits', 'role0']
+        assert streamed['inherits']['mfa_serial'].endswith('mfa/default')
+        assert streamed['role0']['mfa_serial'].endswith('mfa/user')
+
+    def test_02_lookup(self, tmpdir, config_dir):
+        source = str(tmpdir.join('credentials'))
+        output = config_dir + '/lookup.json'
+        write(source, USER + ''.join(ROLE % ('role%d' % i, 'R%d' % i) for i in range(50)))
+        # before indexing, by scan
+        assert refactor.lookup_profile('role7', source, output)['role_arn'].endswith('role/R7')
+        refactor.sync_awscli(source, output)
+        assert refactor.lookup_profile('role42', source, output)['role_arn'].endswith('role/R42')
+        assert refactor.lookup_profile('default', source, output)['aws_access_key_id'] == 'AKIAEXAMPLE'
+        assert refactor.lookup_profile('missing', source, output) is None
+
+    def test_03_lookup_inherits_default(self, tmpdir, config_dir):
+        source = str(tmpdir.join('credentials'))
+        output = config_dir + '/inherit.json'
+        write(source, USER + '[inherits]\nrole_arn = arn:aws:iam::123456789012:role/I\n' +
+              'source_profile = default\n[DEFAULT]\nmfa_serial = m\n')
+        refactor.sync_awscli(source, output)
+        assert refactor.lookup_profile('inherits', source, output)['mfa_serial'] == 'm'
+        assert refactor.lookup_profile('DEFAULT', source, output) is None
+
+    def test_04_malformed_duration_ignored(self, tmpdir, config_dir):
+        source = str(tmpdir.join('credentials'))
+        output = config_dir + '/duration.json'
+        write(source, USER + ROLE % ('role0', 'Admin') + 'duration_seconds = 1h\n' +
+              ROLE % ('role1', 'ReadOnly') + 'duration_seconds = 7200\n')
+        assert refactor.sync_awscli(source, output)['added'] == ['default', 'role0', 'role1']
+        with open(output) as f:
+            profiles = json.load(f)
+        assert 'duration_seconds' not in profiles['role0']
+        assert profiles['role0']['role_arn'].endswith('role/Admin')
+        assert profiles['role1']['duration_seconds'] == 7200
@@ -0,0 +1,66 @@
+"""
+Summary:
+    Tests for stslib results.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import datetime
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.results import RoleResults
+from stslib.vault import STSingleSet
+
+
+def credential_set():
+    now = datetime.datetime.utcnow()
+    return STSingleSet({
+        'StartTime': now,
+        'Expiration': now + datetime.timedelta(hours=1),
+        'AccessKeyId': 'ASIAEXAMPLE',
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token'
+    })
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'AssumeRole')
+
+
+class TestRoleResults():
+    """
+    validate per-role success and failure accounting
+    """
+    def test_01_partial_success(self):
+        """ successes retained alongside failures """
+        results = RoleResults()
+        results.add('a', credential_set())
+        results.add('b', client_error('Throttling'))
+        results.add('c', client_error('AccessDenied'))
+        assert not results.complete
+        assert list(results.successes) == ['a']
+        assert results.retryable() == ['b']
+        assert results.failures['c'].code == 'AccessDenied'
+        assert list(results.credentials('sts-')) == ['sts-a']
+
+    def test_02_merge(self):
+        """ later outcomes supersede earlier outcomes for the same role """
+        first = RoleResults()
+        first.add('a', credential_set())
+        first.add('b', client_error('Throttling'))
+        second = RoleResults()
+        second.add('b', credential_set())
+        merged = first.merge(second)
+        assert merged.complete
+        assert sorted(merged.successes) == ['a', 'b']
+        assert len(first.failures) == 1
+
+    def test_03_connection_errors_retryable(self):
+        results = RoleResults()
+        results.add('a', EndpointConnectionError(endpoint_url='https://sts.amazonaws.com'))
+        results.add('b', KeyError('role_arn'))
+        assert results.retryable() == ['a']
+        assert results.failures['b'].code == 'KeyError'
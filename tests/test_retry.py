@@ -0,0 +1,101 @@
+"""
+Summary:
+    Tests for stslib retry.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.retry import RetryPolicy, CIRCUIT_OPEN
+
+
+class FlakyCall():
+    """ raises the given error codes in sequence, then succeeds """
+    def __init__(self, *codes):
+        self.codes = list(codes)
+        self.calls = 0
+        self.__name__ = 'assume_role'
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.codes:
+            code = self.codes.pop(0)
+            raise ClientError({'Error': {'Code': code, 'Message': code}}, 'AssumeRole')
+        return {'Credentials': kwargs}
+
+
+class TestRetryPolicy():
+    """
+    validate backoff, attempt limits and circuit breaking
+    """
+    def test_01_throttling_retried(self):
+        policy = RetryPolicy(max_attempts=4, base=0.001, cap=0.01)
+        call = FlakyCall('Throttling', 'RequestLimitExceeded')
+        assert policy.call(call, RoleArn='x') == {'Credentials': {'RoleArn': 'x'}}
+        assert call.calls == 3
+
+    def test_02_fatal_not_retried(self):
+        policy = RetryPolicy(max_attempts=4, base=0.001, cap=0.01)
+        call = FlakyCall('AccessDenied')
+        with pytest.raises(ClientError):
+            policy.call(call)
+        assert call.calls == 1
+
+    def test_03_attempts_exhausted(self):
+        policy = RetryPolicy(max_attempts=2, base=0.001, cap=0.01)
+        call = FlakyCall('Throttling', 'Throttling', 'Throttling')
+        with pytest.raises(ClientError):
+            policy.call(call)
+        assert call.calls == 2
+
+    def test_04_circuit_opens(self):
+        policy = RetryPolicy(max_attempts=1, breaker_threshold=2, breaker_reset=60)
+        for _ in range(2):
+            with pytest.raises(ClientError):
+                policy.call(FlakyCall('AccessDenied'), key='123456789012')
+        call = FlakyCall()
+        with pytest.raises(ClientError) as e:
+            policy.call(call, key='123456789012')
+        assert e.value.response['Error']['Code'] == CIRCUIT_OPEN
+        assert call.calls == 0
+        # other accounts unaffected
+        assert policy.call(FlakyCall(), key='210987654321') == {'Credentials': {}}
+
+    def test_05_attempts_override_spares_breaker(self):
+        policy = RetryPolicy(max_attempts=5, breaker_threshold=1, breaker_reset=60)
+        call = FlakyCall('Throttling', 'Throttling')
+        with pytest.raises(ClientError):
+            policy.call(call, key='123456789012', attempts=1)
+        assert call.calls == 1
+        assert policy.breaker('123456789012').state == 'closed'
+
+    def test_06_connection_errors_retried(self):
+        policy = RetryPolicy(max_attempts=3, base=0.001, cap=0.01)
+        failures = [EndpointConnectionError(endpoint_url='https://sts.amazonaws.com'),
+                    ReadTimeoutError(endpoint_url='https://sts.amazonaws.com')]
+
+        def assume_role(**kwargs):
+            if failures:
+                raise failures.pop(0)
+            return {'Credentials': kwargs}
+        assert policy.call(assume_role, key='123456789012') == {'Credentials': {}}
+        assert policy.breaker('123456789012').failures == 0
+
+    def test_07_trial_ended_by_unexpected_error(self):
+        policy = RetryPolicy(max_attempts=1, breaker_threshold=1, breaker_reset=0)
+
+        def broken(**kwargs):
+            raise KeyError('role_arn')
+        with pytest.raises(ClientError):
+            policy.call(FlakyCall('AccessDenied'), key='123456789012')
+        assert policy.breaker('123456789012').state == 'half-open'
+        with pytest.raises(KeyError):
+            policy.call(broken, key='123456789012')
+        # trial recorded as failed; the next trial is permitted
+        assert policy.call(FlakyCall(), key='123456789012') == {'Credentials': {}}
+        assert policy.breaker('123456789012').state == 'closed'
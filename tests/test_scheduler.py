@@ -0,0 +1,123 @@
+"""
+Summary:
+    Tests for the RefreshScheduler in stslib async.py module
+
+Test Framework: pytest
+
+"""
+import sys
+import time
+import datetime
+import importlib
+import pytz
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+RefreshScheduler = importlib.import_module('stslib.async').RefreshScheduler
+jitter = importlib.import_module('stslib.async').jitter
+
+
+def utcnow():
+    return datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+
+
+class TestRefreshScheduler():
+    """
+    validate deadline ordering and per-role refresh
+    """
+    def test_01_due_order(self):
+        scheduler = RefreshScheduler(event=None, skew=datetime.timedelta(minutes=5))
+        now = utcnow()
+        scheduler.schedule('long', now + datetime.timedelta(hours=12))
+        scheduler.schedule('short', now + datetime.timedelta(hours=1))
+        scheduler.schedule('long', now + datetime.timedelta(hours=2))    # replaced
+        pending = scheduler.pending()
+        assert [alias for alias, due in pending] == ['short', 'long']
+        assert pending[1][1] == now + datetime.timedelta(hours=2) - datetime.timedelta(minutes=5)
+
+    def test_02_refreshed_individually(self):
+        refreshed = []
+
+        def event(alias):
+            refreshed.append(alias)
+            return utcnow() + datetime.timedelta(hours=1)
+
+        scheduler = RefreshScheduler(event=event, skew=datetime.timedelta(seconds=60))
+        scheduler.start()
+        now = utcnow()
+        scheduler.schedule('soon', now + datetime.timedelta(seconds=60.2))
+        scheduler.schedule('later', now + datetime.timedelta(hours=1))
+        time.sleep(0.6)
+        scheduler.halt()
+        scheduler.join(timeout=2)
+        assert refreshed == ['soon']
+        assert not scheduler.is_alive()
+        assert [alias for alias, due in scheduler.pending()] == ['later', 'soon']
+
+    def test_03_jittered_timeline(self):
+        window = datetime.timedelta(minutes=10)
+        skew = datetime.timedelta(minutes=5)
+        scheduler = RefreshScheduler(event=None, skew=skew, window=window, node='node-a')
+        expiration = utcnow() + datetime.timedelta(hours=1)
+        aliases = ['role%d' % i for i in range(20)]
+        for alias in aliases:
+            scheduler.schedule(alias, expiration)
+        timeline = scheduler.timeline()
+        dues = [entry['due'] for entry in timeline]
+        assert dues == sorted(dues)
+        assert all(entry['expiration'] == expiration for entry in timeline)
+        assert all(expiration - skew - window < due <= expiration - skew for due in dues)
+        assert len(set(dues)) == len(aliases)       # spread, not in step
+
+
+class TestJitter():
+    """
+    validate deterministic per-node refresh offsets
+    """
+    def test_01_deterministic(self):
+        window = datetime.timedelta(minutes=10)
+        assert jitter('role', window, 'node-a') == jitter('role', window, 'node-a')
+        assert jitter('role', window, 'node-a') != jitter('role', window, 'node-b')
+        assert jitter('role', datetime.timedelta(0), 'node-a') == datetime.timedelta(0)
+
+    def test_02_within_window(self):
+        window = datetime.timedelta(minutes=10)
+        offsets = [jitter('role%d' % i, window, 'node-a') for i in range(200)]
+        assert all(datetime.timedelta(0) <= x < window for x in offsets)
+        # roughly uniform: both halves of the window used
+        assert sum(1 for x in offsets if x < window / 2) > 50
+        assert sum(1 for x in offsets if x >= window / 2) > 50
+
+
+class TestSharedScheduler():
+    """
+    validate one timer thread serving several registrations
+    """
+    def test_01_registrations_share_thread(self):
+        SharedScheduler = importlib.import_module('stslib.async').SharedScheduler
+        refreshed = []
+
+        def owner(name):
+            def event(alias):
+                refreshed.append((name, alias))
+                return utcnow() + datetime.timedelta(hours=1)
+            return event
+
+        scheduler = SharedScheduler(max_workers=2)
+        first = scheduler.register(owner('a'), skew=datetime.timedelta(seconds=60))
+        second = scheduler.register(owner('b'), skew=datetime.timedelta(seconds=60))
+        now = utcnow()
+        first.schedule('role', now + datetime.timedelta(seconds=60.2))
+        second.schedule('role', now + datetime.timedelta(seconds=60.2))
+        second.schedule('other', now + datetime.timedelta(hours=1))
+        assert [alias for alias, due in second.pending()] == ['role', 'other']
+        time.sleep(0.6)
+        assert sorted(refreshed) == [('a', 'role'), ('b', 'role')]
+
+        second.halt()
+        assert second.pending() == []
+        assert not second.is_alive()
+        assert first.is_alive() and scheduler.registered() == 1
+        scheduler.halt()
+        scheduler.join(timeout=2)
+        assert not scheduler.is_alive()
@@ -0,0 +1,434 @@
+"""
+Summary:
+    Tests for stslib core.py StsCore credential generation, run against
+    moto mock sts and iam services (see conftest.py)
+
+Test Framework: pytest
+
+"""
+import sys
+import time
+import datetime
+import threading
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+# target modules
+sys.path.insert(0,'..')        # required to import modules
+from stslib.vault import STSToken, STSingleSet
+
+
+class TestPartialSuccess():
+    """
+    validate per-role isolation of failures in a batch
+    """
+    def test_01_connection_error_isolated(self, core_factory):
+        core = core_factory()
+        request = core._request
+
+        def flaky(source, alias, prefix, start):
+            if alias == 'role1':
+                raise EndpointConnectionError(endpoint_url='https://sts.amazonaws.com')
+            return request(source, alias, prefix, start)
+        core._request = flaky
+        results = core.assume_roles(['role0', 'role1'])
+        assert list(results.successes) == ['role0']
+        assert results.failures['role1'].code == 'EndpointConnectionError'
+        assert results.retryable() == ['role1']
+        assert list(core.credentials) == ['sts-role0']
+
+        core._request = request
+        merged = core.retry_failures()
+        assert merged.complete
+        assert sorted(core.credentials) == ['sts-role0', 'sts-role1']
+
+
+class TestDeferredIdentity():
+    """
+    validate iam and sts identity lookups deferred until first access
+    """
+    def record(self, monkeypatch):
+        from stslib.core import StsCore
+        call, operations = StsCore._call, []
+
+        def recorded(self, client, operation, **kwargs):
+            operations.append(operation)
+            return call(self, client, operation, **kwargs)
+        monkeypatch.setattr(StsCore, '_call', recorded)
+        return operations
+
+    def test_01_construction_makes_no_calls(self, core_factory, monkeypatch):
+        operations = self.record(monkeypatch)
+        core = core_factory(token=False, skip_users=False)
+        assert operations == []
+        assert len(core.clients) == 0
+
+    def test_02_memoized(self, core_factory, monkeypatch):
+        operations = self.record(monkeypatch)
+        core = core_factory(token=False, skip_users=False)
+        core.mfa_serial = None
+        lookups = []
+        get_mfa_info = core.get_mfa_info
+        core.get_mfa_info = lambda user, client: lookups.append(user) or get_mfa_info(user, client)
+        assert core.iam_user == core.iam_user == 'moto'
+        assert core.mfa_serial == core.mfa_serial == ''
+        assert lookups == ['moto']
+        assert core.users is core.users
+        assert operations == ['get_caller_identity', 'list_users']
+
+    def test_03_skip_users(self, core_factory, monkeypatch):
+        operations = self.record(monkeypatch)
+        core = core_factory(token=False, skip_users=True)
+        assert core.users == frozenset()
+        assert 'list_users' not in operations
+
+
+class TestUserDirectory():
+    """
+    validate paginated list_users scans and the on-disk user directory
+    """
+    def paged(self, core, operations):
+        """ moto returns every user at once; serve pages of 100 with Marker """
+        call = core._call
+
+        def paged(client, operation, **kwargs):
+            operations.append(operation)
+            if operation != 'list_users':
+                return call(client, operation, **kwargs)
+            offset = int(kwargs.pop('Marker', 0))
+            response = call(client, operation, **kwargs)
+            users = response['Users']
+            response['Users'] = users[offset:offset + 100]
+            response['IsTruncated'] = offset + 100 < len(users)
+            if response['IsTruncated']:
+                response['Marker'] = str(offset + 100)
+            return response
+        core._call = paged
+
+    def create_users(self, count, start=0):
+        import boto3
+        iam = boto3.client('iam')
+        for i in range(start, start + count):
+            iam.create_user(UserName='user%03d' % i)
+
+    def test_01_all_pages_scanned(self, core_factory):
+        self.create_users(250)
+        core = core_factory(token=False, skip_users=False)
+        operations = []
+        self.paged(core, operations)
+        assert len(core.users) == 250
+        assert 'user249' in core.users
+        assert operations == ['list_users'] * 3
+
+    def test_02_fresh_directory_not_rescanned(self, core_factory):
+        self.create_users(3)
+        first = core_factory(token=False, skip_users=False)
+        assert first.users == frozenset(['user000', 'user001', 'user002'])
+        core = core_factory(token=False, skip_users=False)
+        operations = []
+        self.paged(core, operations)
+        assert core.users == first.users
+        assert operations == []
+
+    def test_03_stale_directory_rescanned(self, core_factory):
+        self.create_users(3)
+        assert len(core_factory(token=False, skip_users=False).users) == 3
+        self.create_users(1, start=3)
+        core = core_factory(token=False, skip_users=False, users_ttl=0)
+        operations = []
+        self.paged(core, operations)
+        assert 'user003' in core.users
+        assert operations == ['list_users']
+
+
+class TestFanOut():
+    """
+    validate concurrent assume_role calls bounded by max_workers
+    """
+    def test_01_calls_overlap_bounded(self, core_factory):
+        core = core_factory(max_workers=2, format='boto')
+        request = core._request
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def slow(source, alias, prefix, start):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            return request(source, alias, prefix, start)
+        core._request = slow
+        credentials = core.generate_credentials(['role0', 'role1', 'role2', 'role3'])
+        assert peak[0] == 2
+        assert sorted(credentials) == ['sts-role0', 'sts-role1', 'sts-role2', 'sts-role3']
+        for credential_set in credentials.values():
+            assert type(credential_set) is dict
+            assert set(credential_set) >= \
+                {'AccessKeyId', 'SecretAccessKey', 'SessionToken', 'Expiration'}
+
+    def test_02_vault_format(self, core_factory):
+        core = core_factory(format='vault')
+        credentials = core.generate_credentials(['role0', 'role1'])
+        assert sorted(credentials) == ['sts-role0', 'sts-role1']
+        for credential_set in credentials.values():
+            assert isinstance(credential_set, STSingleSet)
+            assert credential_set.access_key == credential_set.boto['AccessKeyId']
+            assert credential_set.end > credential_set.start
+
+
+class TestIterCredentials():
+    """
+    validate streaming of credentials as each role completes
+    """
+    def test_01_completion_order(self, core_factory):
+        core = core_factory()
+        request = core._request
+        release = threading.Event()
+
+        def ordered(source, alias, prefix, start):
+            if alias == 'role0':
+                release.wait(5)
+            elif alias == 'role2':
+                raise EndpointConnectionError(endpoint_url='https://sts.amazonaws.com')
+            return request(source, alias, prefix, start)
+        core._request = ordered
+        stream = core.iter_credentials(['role0', 'role1', 'role2'])
+        first = [next(stream), next(stream)]
+        assert sorted(alias for alias, _ in first) == ['role1', 'role2']
+        outcomes = dict(first)
+        assert isinstance(outcomes['role1'], STSingleSet)
+        assert isinstance(outcomes['role2'], EndpointConnectionError)
+        release.set()
+        alias, credential_set = next(stream)
+        assert alias == 'role0' and isinstance(credential_set, STSingleSet)
+        assert list(stream) == []
+
+    def test_02_validation(self, core_factory):
+        core = core_factory()
+        assert list(core.iter_credentials(['role0', 'missing'])) == []
+        assert [x[0] for x in core.iter_credentials(['role0', 'missing'], strict=False)] == ['role0']
+
+
+class TestSelectors():
+    """
+    validate credential generation for selected roles
+    """
+    def test_01_glob_selects_roles_only(self, core_factory):
+        core = core_factory()
+        assert sorted(core.generate_credentials(['*'])) == \
+            ['sts-role0', 'sts-role1', 'sts-role2', 'sts-role3']
+        assert core.results.complete
+
+
+class TestSingleFlight():
+    """
+    validate renewal with cross-process de-duplication enabled
+    """
+    def test_01_refresh_renews(self, core_factory):
+        core = core_factory(single_flight=True, format='boto')
+        core.generate_credentials(['role0'])
+        first = core.credentials['sts-role0']
+        assert core._refresh_role('role0') >= first['Expiration']
+        assert core.credentials['sts-role0']['AccessKeyId'] != first['AccessKeyId']
+
+
+def boto_set(access_key, seconds=3600):
+    now = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
+    return {
+        'StartTime': now,
+        'Expiration': now + datetime.timedelta(seconds=seconds),
+        'AccessKeyId': access_key,
+        'SecretAccessKey': 'secret',
+        'SessionToken': 'token'
+    }
+
+
+class TestSnapshots():
+    """
+    validate publication of credentials as read-only snapshots
+    """
+    def test_01_publish_atomic(self, core_factory):
+        core = core_factory(format='boto', token=False)
+        keys = ['sts-role%d' % i for i in range(20)]
+        torn, done = [], threading.Event()
+
+        def read():
+            while not done.is_set():
+                snapshot = core.credentials
+                versions = set(x['AccessKeyId'] for x in snapshot.values())
+                if snapshot and (len(snapshot) != len(keys) or len(versions) != 1):
+                    torn.append(dict(snapshot))
+        reader = threading.Thread(target=read)
+        reader.start()
+        for version in range(200):
+            core._store_credentials({k: boto_set('ASIA%d' % version) for k in keys})
+        done.set()
+        reader.join()
+        assert torn == []
+        with pytest.raises(TypeError):
+            core.credentials['sts-role0'] = boto_set('ASIAX')
+
+    def test_02_merge_keeps_other_roles(self, core_factory):
+        core = core_factory(format='boto')
+        returned = core.generate_credentials(['role0', 'role1'])
+        assert type(returned) is dict
+        first = dict(core.credentials)
+        core._refresh_role('role0')
+        assert sorted(core.credentials) == ['sts-role0', 'sts-role1']
+        assert core.credentials['sts-role1'] == first['sts-role1']
+        assert core.credentials['sts-role0']['AccessKeyId'] != first['sts-role0']['AccessKeyId']
+        # the returned copy is unaffected by later publication
+        assert returned == first
+
+    def test_03_mixed_expirations(self, core_factory):
+        core = core_factory(format='boto', token=False)
+        core._store_credentials({
+            'sts-role0': boto_set('LONG', 43200),
+            'sts-role1': boto_set('EXPIRED', -60)
+        }, persist=False)
+        assert list(core.current_credentials()) == ['sts-role0']
+        assert core.calc_lifetime()[1] == datetime.timedelta(0)
+
+
+class TestServeStale():
+    """
+    validate stale-while-revalidate serving
+    """
+    def test_01_stale_served_while_renewed(self, core_factory):
+        core = core_factory(format='boto', serve_stale=True)
+        core._store_credentials({'sts-role0': boto_set('ASIASTALE', 60)}, persist=False)
+        release = threading.Event()
+        refresh = core._refresh_role
+
+        def slow_refresh(alias):
+            release.wait(5)
+            return refresh(alias)
+        core._refresh_role = slow_refresh
+        served = core.current_credentials()
+        assert served['sts-role0']['AccessKeyId'] == 'ASIASTALE'
+        assert core.staleness()['role0'] > datetime.timedelta(0)
+        future = core._revalidating['role0']
+        release.set()
+        assert future.result(5) is not None
+        assert core.credentials['sts-role0']['AccessKeyId'] != 'ASIASTALE'
+        assert core.staleness()['role0'] == datetime.timedelta(0)
+
+    def test_02_expired_blocks_until_renewed(self, core_factory):
+        core = core_factory(format='boto', serve_stale=True)
+        core._store_credentials({'sts-role0': boto_set('ASIAEXPIRED', -1)}, persist=False)
+        served = core.serve_credentials(['role0'])
+        assert served['sts-role0']['AccessKeyId'] != 'ASIAEXPIRED'
+        assert served['sts-role0']['Expiration'] > boto_set('ASIAX', 0)['Expiration']
+
+    def test_03_concurrent_callers_share_renewal(self, core_factory):
+        core = core_factory(format='boto', serve_stale=True)
+        core._store_credentials({'sts-role0': boto_set('ASIAEXPIRED', -1)}, persist=False)
+        refresh, calls = core._refresh_role, []
+
+        def counted(alias):
+            calls.append(alias)
+            time.sleep(0.2)
+            return refresh(alias)
+        core._refresh_role = counted
+        served = []
+        callers = [
+            threading.Thread(target=lambda: served.append(core.serve_credentials(['role0'])))
+            for _ in range(5)
+        ]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+        assert calls == ['role0']
+        assert len(set(x['sts-role0']['AccessKeyId'] for x in served)) == 1
+
+    def test_04_unrenewable_role_omitted(self, core_factory):
+        core = core_factory(format='boto', serve_stale=True)
+        core._store_credentials({
+            'sts-role0': boto_set('ASIAEXPIRED', -1),
+            'sts-role1': boto_set('ASIAFRESH')
+        }, persist=False)
+        core._refresh_role = lambda alias: None
+        assert list(core.serve_credentials()) == ['sts-role1']
+        # same return type in either serving mode
+        assert type(core.current_credentials()) is dict
+
+
+def expired_token():
+    token = boto_set('ASIAEXPIRED', -60)
+    token['StartTime'] -= datetime.timedelta(hours=1)
+    return STSToken(token)
+
+
+class TestExpiredToken():
+    """
+    validate that an expired session token ends credential generation quietly
+    """
+    def test_01_nothing_generated(self, core_factory):
+        core = core_factory(token=False)
+        core.token = expired_token()
+        assert not core._valid_token(core.token)
+        assert list(core.iter_credentials(['role0', 'role1'])) == []
+        assert len(core.assume_roles(['role0'])) == 0
+        assert core.generate_credentials(['role0']) == {}
+        assert core._refresh_role('role0') is None
+        assert core.credentials == {}
+
+
+class LimitedRole():
+    """ sts client stub; rejects DurationSeconds above max_session """
+    def __init__(self, max_session):
+        self.max_session = max_session
+        self.requested = []
+
+    def assume_role(self, **kwargs):
+        self.requested.append(kwargs['DurationSeconds'])
+        if kwargs['DurationSeconds'] > self.max_session:
+            raise ClientError({'Error': {
+                'Code': 'ValidationError',
+                'Message': 'The requested DurationSeconds exceeds the MaxSessionDuration set for this role.'
+            }}, 'AssumeRole')
+        return {'Credentials': boto_set('ASIA%d' % kwargs['DurationSeconds'])}
+
+
+class TestRoleDuration():
+    """
+    validate per-role credential lifetime selection and fallback
+    """
+    def test_01_precedence(self, core_factory):
+        core = core_factory(token=False)
+        assert core.role_duration('role0') == 3600                  # default
+        core.discover_duration = True
+        core._max_session_duration = lambda alias: 14400
+        assert core.role_duration('role0') == 14400                 # discovered
+        core.profiles['role0']['duration_seconds'] = 7200
+        assert core.role_duration('role0') == 7200                  # profile
+        core.role_durations['role0'] = 10800
+        assert core.role_duration('role0') == 10800                 # accepted before
+        core.profiles['role1']['duration_seconds'] = 10 ** 6
+        assert core.role_duration('role1') == 43200                 # clamped
+
+    def test_02_fallback_to_max_session_duration(self, core_factory):
+        core = core_factory(token=False)
+        core.profiles['role0']['duration_seconds'] = 43200
+        core._max_session_duration = lambda alias: 7200
+        client = LimitedRole(7200)
+        core._assume_role(client, 'role0', 'sts-')
+        assert client.requested == [43200, 7200]
+        assert core.role_durations['role0'] == 7200
+
+    def test_03_fallback_bisects(self, core_factory):
+        core = core_factory(token=False)
+        core.profiles['role0']['duration_seconds'] = 43200
+        core._max_session_duration = lambda alias: None
+        client = LimitedRole(18000)
+        response = core._assume_role(client, 'role0', 'sts-')
+        assert response['Credentials']['AccessKeyId'] == 'ASIA18000'
+        assert core.role_durations['role0'] == 18000
+        assert len(client.requested) <= 5
+        # remembered; no further probing
+        core._assume_role(client, 'role0', 'sts-')
+        assert client.requested[-1] == 18000
+        assert core.retry_policy.breaker('100000000000').state == 'closed'